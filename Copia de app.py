@@ -1,6 +1,6 @@
 import streamlit as st
-import json
-import google.generativeai as genai
+
+from priorizador import Options, PriorizadorError, prioritize
 
 # --- 1. CONFIGURACIÓN DE PÁGINA ---
 st.set_page_config(page_title="Priorizador de Tareas", layout="centered")
@@ -22,13 +22,12 @@ st.markdown(hide_streamlit_style, unsafe_allow_html=True)
 # --- 2. CONFIGURACIÓN DEL CEREBRO ---
 try:
     api_key = st.secrets["GOOGLE_API_KEY"]
-    genai.configure(api_key=api_key)
 except Exception:
     st.error("⚠️ Falta la API Key en .streamlit/secrets.toml")
     st.stop()
 
 # --- 3. MODELO FIJO ---
-modelo_seleccionado = "models/gemma-3-1b-it"
+modelo_seleccionado = "gemma"
 
 # --- INTERFAZ PRINCIPAL ---
 st.title("🛡️ Priorizador de Tareas")
@@ -46,29 +45,10 @@ tasks_input = st.text_area("2. Pega tu lista de tareas:", height=150, placeholde
 # --- LÓGICA DE INTELIGENCIA ARTIFICIAL ---
 def analyze_tasks(tasks, role, model_name):
     try:
-        model = genai.GenerativeModel(model_name)
-        
-        prompt = f"""
-        Actúa como experto en productividad para un "{role}".
-        Clasifica estas tareas en la Matriz de Eisenhower.
-        
-        TAREAS:
-        {tasks}
-        
-        FORMATO JSON REQUERIDO (Solo JSON, sin markdown):
-        {{
-            "hacer": ["tarea 1"],
-            "planificar": ["tarea 2"],
-            "delegar": ["tarea 3"],
-            "eliminar": ["tarea 4"],
-            "recomendacion_top": "Consejo breve"
-        }}
-        """
-        response = model.generate_content(prompt)
-        clean_text = response.text.replace("```json", "").replace("```", "").strip()
-        return json.loads(clean_text)
+        matrix = prioritize(tasks, role, backend=model_name, options=Options(api_key=api_key))
+        return matrix.to_dict()
 
-    except Exception as e:
+    except PriorizadorError as e:
         st.error(f"Error procesando con el modelo: {e}")
         return None
 
@@ -1,7 +1,10 @@
 import streamlit as st
-import json
-import google.generativeai as genai
 import os
+import uuid
+
+from priorizador import Options, PriorizadorError, prioritize
+from priorizador.export import MIME_TYPES, Exporter
+from priorizador.ingest import iter_batches, iter_rows, iter_tasks
 
 # --- 1. CONFIGURACIÓN DE PÁGINA ---
 st.set_page_config(page_title="Priorizador Eisenhower", page_icon="🛡️", layout="wide")
@@ -19,12 +22,15 @@ st.markdown("""
 try:
     # Intenta leer la clave desde los secretos de Streamlit (secrets.toml o Cloud)
     api_key = st.secrets["GOOGLE_API_KEY"]
-    genai.configure(api_key=api_key)
 except Exception:
     st.error("⚠️ Error de Seguridad: No se encontró la API KEY.")
     st.info("Nota: Si estás en local, asegura que exista .streamlit/secrets.toml. Si estás en la nube, configúrala en los 'Secrets' del dashboard.")
     st.stop()
 
+# Identificador de la sesión: la cuota de la IA se reparte por turnos entre sesiones
+if "session_id" not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
+
 # --- 3. INTERFAZ DE USUARIO ---
 st.title("🛡️ Priorizador de Eisenhower")
 st.caption("Organización inteligente de tareas basada en tu rol profesional.")
@@ -46,77 +52,194 @@ tasks_input = st.text_area(
     placeholder="Revisar contrato del cliente X\nComprar cartulina para el hijo\nLlamar al contador..."
 )
 
+# Importación masiva desde planillas
+with st.expander("📂 Importar desde CSV o Excel"):
+    uploaded_file = st.file_uploader(
+        "Sube un archivo con una tarea por fila (columnas opcionales: vence, responsable, rol)",
+        type=["csv", "xlsx"],
+    )
+    st.caption("Si subes un archivo, se usa en lugar de la lista escrita arriba.")
+
+# Modo de análisis: IA (más fino) o reglas locales (instantáneo, sin conexión)
+# En modo IA el router elige Flash o Gemma según el tamaño y la claridad de la lista
+MODES = {"🤖 Inteligencia Artificial": "auto", "⚡ Rápido (sin conexión)": "reglas"}
+mode_label = st.radio("⚙️ Modo de análisis", list(MODES), horizontal=True)
+analysis_backend = MODES[mode_label]
+
 # --- 4. LÓGICA DE INTELIGENCIA ARTIFICIAL ---
-def analyze_tasks(tasks, role):
-    try:
-        # Usamos un modelo fijo y rápido (Flash) para que el usuario no tenga que elegir
-        model = genai.GenerativeModel("gemini-2.5-flash")
-        
-        prompt = f"""
-        Actúa como un experto en productividad para un "{role}".
-        Clasifica estas tareas en la Matriz de Eisenhower.
-        
-        TAREAS:
-        {tasks}
-        
-        FORMATO JSON REQUERIDO (Estrictamente solo JSON):
-        {{
-            "hacer": ["tarea 1", "tarea 2"],
-            "planificar": ["tarea 3"],
-            "delegar": ["tarea 4"],
-            "eliminar": ["tarea 5"],
-            "recomendacion_top": "Un consejo breve de una frase sobre el foco de hoy"
-        }}
-        """
-        response = model.generate_content(prompt)
-        # Limpieza de la respuesta para asegurar JSON puro
-        clean_text = response.text.replace("```json", "").replace("```", "").strip()
-        return json.loads(clean_text)
+# Segundos que un usuario tolera esperando la matriz; el router evita el modelo que no llega
+LATENCY_BUDGET = 15
 
-    except Exception as e:
+# El router elige el modelo en cada pedido para que el usuario no tenga que elegir
+def analyze_tasks(tasks, role, on_event=None, backend="auto"):
+    # on_event(tipo, cuadrante, texto) recibe cada tarea apenas se conoce (modo streaming)
+    try:
+        # Si la IA falla o se demora, el motor entrega la clasificación por reglas locales
+        options = Options(api_key=api_key, on_event=on_event, session=st.session_state.session_id,
+                          budget=LATENCY_BUDGET, fallback=True)
+        matrix = prioritize(tasks, role, backend=backend, options=options)
+    except PriorizadorError as e:
         st.error(f"Error al procesar: {e}")
         return None
+    if matrix.error:
+        st.warning(f"⚠️ La IA no respondió ({matrix.error}). Mostramos una clasificación rápida local.")
+    return matrix.to_dict()
+
+def render_quadrant(slot, items):
+    # Un solo bloque markdown por cuadrante: redibujarlo en cada evento sale barato
+    if items:
+        slot.markdown("\n\n".join(f"• {t}" for t in items))
+    else:
+        slot.markdown("*Nada por aquí*")
+
+def render_tip(slot, tip):
+    slot.markdown(f"""
+    <div style="background-color:#f0f2f6;padding:15px;border-radius:10px;margin-top:20px;text-align:center;">
+        <b>💡 Consejo del Coach:</b> {tip}
+    </div>
+    """, unsafe_allow_html=True)
+
+def render_queue(slot, position):
+    # Con mucha demanda las llamadas a la IA esperan turno; se muestra el lugar en la fila
+    if position:
+        slot.info(f"⏳ En cola, posición {position}. Hay mucha demanda; tu análisis empieza en breve.")
+    else:
+        slot.empty()
+
+@st.cache_resource
+def get_exporter():
+    return Exporter()
+
+# Cada cuánto se vuelve a dibujar el bloque de descargas (segundos)
+DOWNLOAD_POLL = 0.5
+
+@st.fragment(run_every=DOWNLOAD_POLL)
+def download_buttons(pdf_job, xlsx_job):
+    # Solo se dibujan botones con archivos ya listos; el fragmento se redibuja solo hasta que lo estén
+    if not (pdf_job.done() and xlsx_job.done()):
+        st.caption("⏳ Preparando descargas...")
+        return
+    col_pdf, col_xlsx = st.columns(2)
+    for col, job, label, fmt in ((col_pdf, pdf_job, "📄 Descargar PDF", "pdf"),
+                                 (col_xlsx, xlsx_job, "📊 Descargar Excel", "xlsx")):
+        with col:
+            if job.exception() is not None:
+                st.error(f"No se pudo generar el archivo {fmt.upper()}: {job.exception()}")
+                continue
+            st.download_button(label, data=job.result(), file_name=f"matriz_eisenhower.{fmt}",
+                               mime=MIME_TYPES[fmt], on_click="ignore", use_container_width=True)
+
+def offer_downloads(result, role):
+    # Los archivos se generan en segundo plano; la página no espera por ellos
+    exporter = get_exporter()
+    download_buttons(exporter.submit(result, role, "pdf"), exporter.submit(result, role, "xlsx"))
+
+def draw_board():
+    # La matriz se dibuja primero vacía y se va llenando a medida que llegan las tareas
+    board = st.empty()
+    with board.container():
+        st.divider()
+
+        # Fila superior
+        col1, col2 = st.columns(2)
+        with col1:
+            st.success("🔥 1. HACER YA (Urgente e Importante)")
+            slot_hacer = st.empty()
+
+        with col2:
+            st.info("📅 2. PLANIFICAR (No Urgente pero Importante)")
+            slot_planificar = st.empty()
+
+        st.divider()
+
+        # Fila inferior
+        col3, col4 = st.columns(2)
+        with col3:
+            st.warning("🤝 3. DELEGAR (Urgente pero No Importante)")
+            slot_delegar = st.empty()
+
+        with col4:
+            st.error("🗑️ 4. ELIMINAR (Ni Urgente ni Importante)")
+            slot_eliminar = st.empty()
+
+        # Consejo final
+        slot_tip = st.empty()
+
+    slots = {"hacer": slot_hacer, "planificar": slot_planificar, "delegar": slot_delegar, "eliminar": slot_eliminar}
+    return board, slots, slot_tip
+
+def import_file(uploaded, role, backend):
+    # Lectura por partes, deduplicación y clasificación en lotes con barra de progreso
+    try:
+        tasks = list(iter_tasks(iter_rows(uploaded, uploaded.name), role))
+    except Exception as e:
+        st.error(f"No se pudo leer el archivo: {e}")
+        return
+    if not tasks:
+        st.warning("⚠️ El archivo no tiene tareas.")
+        return
+
+    queue_slot = st.empty()
+    board, slots, slot_tip = draw_board()
+    combined = {quadrant: [] for quadrant in slots}
+
+    def on_event(kind, quadrant, text):
+        if kind == "queued":
+            render_queue(queue_slot, text)
+
+    tip = ""
+    progress = st.progress(0.0, text=f"Clasificando {len(tasks)} tareas...")
+    done = skipped = 0
+    for batch_role, batch in iter_batches(tasks):
+        result = analyze_tasks(batch, batch_role, on_event=on_event, backend=backend)
+        done += len(batch)
+        progress.progress(done / len(tasks), text=f"Clasificadas {done} de {len(tasks)} tareas")
+        if result is None:
+            # El error ya se mostró (p. ej. una celda demasiado larga): se sigue con el resto
+            skipped += len(batch)
+            continue
+        for quadrant, slot in slots.items():
+            combined[quadrant].extend(result.get(quadrant, []))
+            render_quadrant(slot, combined[quadrant])
+        tip = tip or result.get("recomendacion_top", "")
+    progress.empty()
+    if skipped == len(tasks):
+        board.empty()
+        return
+    if skipped:
+        st.warning(f"⚠️ {skipped} de {len(tasks)} tareas no se pudieron clasificar y quedaron fuera de la matriz.")
+    render_tip(slot_tip, tip)
+    combined["recomendacion_top"] = tip
+    offer_downloads(combined, role)
 
 # --- 5. EJECUCIÓN ---
 if st.button("🚀 Priorizar Ahora", type="primary", use_container_width=True):
-    if not tasks_input:
+    if uploaded_file is not None:
+        import_file(uploaded_file, user_role, analysis_backend)
+    elif not tasks_input:
         st.warning("⚠️ La lista está vacía. Escribe algo para comenzar.")
     else:
+        queue_slot = st.empty()
+        board, slots, slot_tip = draw_board()
+        streamed = {quadrant: [] for quadrant in slots}
+
+        def on_event(kind, quadrant, text):
+            if kind == "task":
+                streamed[quadrant].append(text)
+                render_quadrant(slots[quadrant], streamed[quadrant])
+            elif kind == "tip":
+                render_tip(slot_tip, text)
+            elif kind == "queued":
+                render_queue(queue_slot, text)
+
         with st.spinner("Analizando urgencia e importancia..."):
-            result = analyze_tasks(tasks_input, user_role)
-            
-            if result:
-                st.divider()
-                
-                # Fila superior
-                col1, col2 = st.columns(2)
-                with col1:
-                    st.success("🔥 1. HACER YA (Urgente e Importante)")
-                    for t in result.get("hacer", []): st.write(f"• {t}")
-                    if not result.get("hacer"): st.write("*Nada por aquí*")
-                
-                with col2:
-                    st.info("📅 2. PLANIFICAR (No Urgente pero Importante)")
-                    for t in result.get("planificar", []): st.write(f"• {t}")
-                    if not result.get("planificar"): st.write("*Nada por aquí*")
-
-                st.divider()
-
-                # Fila inferior
-                col3, col4 = st.columns(2)
-                with col3:
-                    st.warning("🤝 3. DELEGAR (Urgente pero No Importante)")
-                    for t in result.get("delegar", []): st.write(f"• {t}")
-                    if not result.get("delegar"): st.write("*Nada por aquí*")
-                
-                with col4:
-                    st.error("🗑️ 4. ELIMINAR (Ni Urgente ni Importante)")
-                    for t in result.get("eliminar", []): st.write(f"• {t}")
-                    if not result.get("eliminar"): st.write("*Nada por aquí*")
-                
-                # Consejo final
-                st.markdown(f"""
-                <div style="background-color:#f0f2f6;padding:15px;border-radius:10px;margin-top:20px;text-align:center;">
-                    <b>💡 Consejo del Coach:</b> {result.get('recomendacion_top', '')}
-                </div>
-                """, unsafe_allow_html=True)
\ No newline at end of file
+            result = analyze_tasks(tasks_input, user_role, on_event=on_event, backend=analysis_backend)
+
+        if result:
+            # Dibujo final con el orden definitivo
+            for quadrant, slot in slots.items():
+                render_quadrant(slot, result.get(quadrant, []))
+            render_tip(slot_tip, result.get('recomendacion_top', ''))
+            offer_downloads(result, user_role)
+        else:
+            board.empty()
@@ -0,0 +1,32 @@
+"""Motor del Priorizador de Eisenhower (sin dependencias de la interfaz).
+
+    from priorizador import prioritize
+    matriz = prioritize("Pagar impuestos hoy\nVer Netflix", "Abogado", backend="reglas")
+"""
+from priorizador.api import Matrix, Options, prioritize, prioritize_async
+from priorizador.backends import BACKENDS, Backend, get_backend, register_backend
+from priorizador.errors import (
+    BackendError,
+    ConfigurationError,
+    DeadlineExceeded,
+    PriorizadorError,
+    ResponseFormatError,
+    TokenBudgetExceeded,
+)
+
+__all__ = [
+    "BACKENDS",
+    "Backend",
+    "BackendError",
+    "ConfigurationError",
+    "DeadlineExceeded",
+    "Matrix",
+    "Options",
+    "PriorizadorError",
+    "ResponseFormatError",
+    "TokenBudgetExceeded",
+    "get_backend",
+    "prioritize",
+    "prioritize_async",
+    "register_backend",
+]
@@ -0,0 +1,5 @@
+import sys
+
+from priorizador.cli import main
+
+sys.exit(main())
@@ -0,0 +1,207 @@
+"""Motor asíncrono: llamadas concurrentes con límite global, plazos y cobertura.
+
+Con un modelo alternativo, cada bloque se "cubre": si el principal no respondió
+en su p95 reciente, se lanza el mismo pedido al alternativo y gana el primero
+que devuelva un resultado válido (el otro se cancela).
+
+Se usa desde Streamlit a través de un event loop compartido que vive en un
+hilo propio (`run_with_events`) y desde herramientas batch con
+`asyncio.run`.
+"""
+import asyncio
+import queue
+import threading
+import time
+import weakref
+
+from priorizador.cache import split_tasks
+from priorizador.engine import (
+    MAX_WORKERS,
+    QUADRANTS,
+    build_prompt,
+    build_tip_prompt,
+    default_tip,
+    emit_result,
+    generation_config,
+    parse_response,
+    plan_chunks,
+)
+from priorizador.latency import TRACKER
+from priorizador.quota import reporting, within
+from priorizador.retry import DEFAULT_POLICY
+
+# Llamadas simultáneas al modelo por event loop
+MAX_CONCURRENCY = 8
+# Plazo por llamada individual (segundos)
+CALL_TIMEOUT = 30
+# Espera antes de cubrir con el modelo alternativo mientras no haya p95 medido
+HEDGE_DELAY = 5
+# Nunca se cubre antes de esto, aunque el p95 sea muy bajo
+MIN_HEDGE_DELAY = 0.5
+
+_semaphores = weakref.WeakKeyDictionary()
+
+
+def _limiter():
+    loop = asyncio.get_running_loop()
+    semaphore = _semaphores.get(loop)
+    if semaphore is None:
+        semaphore = _semaphores[loop] = asyncio.Semaphore(MAX_CONCURRENCY)
+    return semaphore
+
+
+async def classify_async(model, tasks, role, timeout=CALL_TIMEOUT, retry=DEFAULT_POLICY):
+    lines = split_tasks(tasks)
+
+    async def attempt():
+        # El cupo se suelta durante la espera entre intentos
+        async with _limiter():
+            response = await asyncio.wait_for(
+                model.generate_content_async(
+                    build_prompt(lines, role, model=model), generation_config=generation_config(model)
+                ),
+                timeout,
+            )
+        return parse_response(response.text, lines)
+
+    started = time.monotonic()
+    try:
+        result = await retry.acall(attempt)
+    except Exception:
+        TRACKER.record_error(getattr(model, "model_name", ""))
+        raise
+    TRACKER.record(getattr(model, "model_name", ""), time.monotonic() - started)
+    return result
+
+
+def hedge_delay(model, timeout=CALL_TIMEOUT):
+    """Cuánto esperar al modelo principal antes de lanzar el alternativo: su p95 reciente."""
+    p95 = TRACKER.percentile(getattr(model, "model_name", ""), 0.95, default=HEDGE_DELAY)
+    return min(max(p95, MIN_HEDGE_DELAY), timeout)
+
+
+async def classify_hedged(model, alternate, tasks, role, timeout=CALL_TIMEOUT):
+    """Como `classify_async`, cubierto con `alternate` si `model` se demora o falla."""
+    running = {asyncio.ensure_future(classify_async(model, tasks, role, timeout))}
+    errors = []
+    hedged = False
+    try:
+        while running:
+            done, running = await asyncio.wait(
+                running, timeout=None if hedged else hedge_delay(model, timeout), return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                errors.append(task.exception())
+            if not hedged:
+                # Se venció la espera o el principal falló: el alternativo entra en carrera
+                hedged = True
+                running.add(asyncio.ensure_future(classify_async(alternate, tasks, role, timeout)))
+        raise errors[0]
+    finally:
+        for task in running:
+            task.cancel()
+
+
+async def summarize_tip_async(model, result, role, timeout=CALL_TIMEOUT):
+    try:
+        async with _limiter():
+            response = await asyncio.wait_for(
+                model.generate_content_async(build_tip_prompt(result, role, model=model)), timeout
+            )
+        tip = response.text.strip().strip('"')
+    except Exception:
+        tip = ""
+    return tip or default_tip(result)
+
+
+async def analyze_tasks_async(model, tasks, role, deadline=None, call_timeout=CALL_TIMEOUT, on_event=None,
+                              alternate=None):
+    """Clasifica la lista por bloques concurrentes y devuelve la matriz fusionada.
+
+    `deadline` es el plazo total en segundos: al vencer se cancelan las llamadas
+    pendientes y se lanza asyncio.TimeoutError. Con `alternate`, cada bloque va
+    cubierto por ese modelo (ver `classify_hedged`).
+    """
+    lines = split_tasks(tasks)
+    chunks = plan_chunks(lines, role, MAX_WORKERS)
+
+    async def classify_chunk(chunk):
+        if alternate is None:
+            return await classify_async(model, chunk, role, call_timeout)
+        return await classify_hedged(model, alternate, chunk, role, call_timeout)
+
+    async def run():
+        if len(chunks) <= 1:
+            result = await classify_chunk(lines)
+            if on_event:
+                emit_result(result, on_event, tip=False)
+            return result
+
+        async def one(chunk):
+            partial = await classify_chunk(chunk)
+            if on_event:
+                emit_result(partial, on_event, tip=False)
+            return partial
+
+        # gather conserva el orden de los bloques y cancela el resto si uno falla
+        partials = await asyncio.gather(*(one(chunk) for chunk in chunks))
+        result = {quadrant: [] for quadrant in QUADRANTS}
+        for partial in partials:
+            for quadrant in QUADRANTS:
+                result[quadrant].extend(partial[quadrant])
+        result["recomendacion_top"] = await summarize_tip_async(model, result, role, call_timeout)
+        if on_event:
+            on_event("tip", None, result["recomendacion_top"])
+        return result
+
+    # Los avisos de fila salen por el mismo `on_event` (en run_with_events es una cola segura entre hilos);
+    # el plazo también recorta el timeout de cada llamada, ya con la cuota en mano
+    with reporting(on_event), within(deadline):
+        if deadline is None:
+            return await run()
+        return await asyncio.wait_for(run(), deadline)
+
+
+# --- EVENT LOOP COMPARTIDO ---
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def get_loop():
+    """Event loop del proceso, corriendo en un hilo daemon."""
+    global _loop
+    with _loop_lock:
+        if _loop is None or _loop.is_closed():
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="priorizador-loop", daemon=True).start()
+        return _loop
+
+
+def run_with_events(make_coro, on_event, timeout=None):
+    """Ejecuta en el loop compartido la corrutina de `make_coro` y entrega sus eventos en el hilo que llama.
+
+    `make_coro(emit)` recibe la función que la corrutina debe usar como
+    `on_event`; aquí esos eventos se reenvían a `on_event` (por ejemplo, para
+    dibujar en Streamlit, que solo acepta llamadas desde el hilo del script).
+    """
+    events = queue.Queue()
+    done = object()
+    future = asyncio.run_coroutine_threadsafe(make_coro(lambda *event: events.put(event)), get_loop())
+    future.add_done_callback(lambda _: events.put(done))
+    limit = None if timeout is None else time.monotonic() + timeout
+    try:
+        while True:
+            remaining = None if limit is None else max(limit - time.monotonic(), 0)
+            try:
+                event = events.get(timeout=remaining)
+            except queue.Empty:
+                raise TimeoutError("Se superó el plazo del análisis")
+            if event is done:
+                break
+            on_event(*event)
+        return future.result()
+    except BaseException:
+        future.cancel()
+        raise
@@ -0,0 +1,91 @@
+"""Punto de entrada de la librería: `prioritize` y `prioritize_async`."""
+from dataclasses import dataclass, field
+
+from priorizador.backends import get_backend
+from priorizador.errors import BackendError
+from priorizador.quota import session
+from priorizador.rules import classify_rules
+
+
+@dataclass
+class Matrix:
+    hacer: list = field(default_factory=list)
+    planificar: list = field(default_factory=list)
+    delegar: list = field(default_factory=list)
+    eliminar: list = field(default_factory=list)
+    recomendacion_top: str = ""
+    backend: str = ""
+    # Si el backend falló y se usaron las reglas locales, aquí queda el motivo
+    error: str = ""
+    # Con backend="auto": por qué se eligió ese modelo
+    route: str = ""
+
+    @classmethod
+    def from_dict(cls, data, backend="", error="", route=""):
+        return cls(
+            hacer=list(data.get("hacer", [])),
+            planificar=list(data.get("planificar", [])),
+            delegar=list(data.get("delegar", [])),
+            eliminar=list(data.get("eliminar", [])),
+            recomendacion_top=data.get("recomendacion_top", ""),
+            backend=backend,
+            error=error,
+            route=route,
+        )
+
+    def to_dict(self):
+        """El dict de siempre: los cuatro cuadrantes y el consejo."""
+        return {
+            "hacer": self.hacer,
+            "planificar": self.planificar,
+            "delegar": self.delegar,
+            "eliminar": self.eliminar,
+            "recomendacion_top": self.recomendacion_top,
+        }
+
+
+@dataclass
+class Options:
+    api_key: str = None
+    # on_event(tipo, cuadrante, texto) por cada tarea apenas se conoce (solo síncrono);
+    # también ("queued", None, posición) mientras se espera cuota del modelo
+    on_event: object = None
+    # Identifica a quien pide (sesión, cliente): la cuota se reparte por turnos entre sesiones
+    session: str = None
+    deadline: float = None
+    timeout: float = None
+    # Latencia máxima deseada (segundos); el router "auto" la usa para elegir modelo
+    budget: float = None
+    # Ante un BackendError, devolver la clasificación por reglas en vez de lanzar
+    fallback: bool = False
+
+
+def _fallback(tasks, role, error, route=""):
+    return Matrix.from_dict(classify_rules(tasks, role), backend="reglas", error=str(error), route=route)
+
+
+def prioritize(tasks, role, *, backend="flash", options=None) -> Matrix:
+    """Clasifica `tasks` (texto con una tarea por línea, o lista) para `role`."""
+    options = options or Options()
+    engine, route = get_backend(backend, options.api_key).route(tasks, role, options.budget)
+    try:
+        with session(options.session):
+            result = engine.classify(tasks, role, options.on_event, deadline=options.deadline, timeout=options.timeout)
+    except BackendError as e:
+        if not options.fallback:
+            raise
+        return _fallback(tasks, role, e, route)
+    return Matrix.from_dict(result, backend=engine.name, route=route)
+
+
+async def prioritize_async(tasks, role, *, backend="flash", options=None) -> Matrix:
+    options = options or Options()
+    engine, route = get_backend(backend, options.api_key).route(tasks, role, options.budget)
+    try:
+        with session(options.session):
+            result = await engine.aclassify(tasks, role, deadline=options.deadline, timeout=options.timeout)
+    except BackendError as e:
+        if not options.fallback:
+            raise
+        return _fallback(tasks, role, e, route)
+    return Matrix.from_dict(result, backend=engine.name, route=route)
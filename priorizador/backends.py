@@ -0,0 +1,319 @@
+"""Backends intercambiables: Gemini Flash, Gemma 1B, Flash cubierto por Gemma,
+un router automático entre ambos, una cascada Gemma -> Flash, reglas locales y
+un simulado.
+
+Todos exponen la misma interfaz (`classify` / `aclassify`) y convierten
+cualquier falla en un error tipado de `priorizador.errors`. Los módulos
+pesados (google.generativeai, NumPy) se importan solo al crear un backend de
+modelo.
+"""
+import asyncio
+import os
+import threading
+import time
+import tomllib
+
+from priorizador.engine import emit_result
+from priorizador.errors import BackendError, ConfigurationError, DeadlineExceeded, PriorizadorError
+from priorizador.rules import classify_rules
+
+SECRETS_PATH = os.path.join(".streamlit", "secrets.toml")
+
+
+def read_api_key():
+    """GOOGLE_API_KEY del entorno o, si no está, de .streamlit/secrets.toml."""
+    api_key = os.environ.get("GOOGLE_API_KEY")
+    if api_key:
+        return api_key
+    try:
+        with open(SECRETS_PATH, "rb") as handle:
+            return tomllib.load(handle).get("GOOGLE_API_KEY")
+    except (OSError, tomllib.TOMLDecodeError):
+        return None
+
+
+class Backend:
+    name = ""
+    model_name = ""
+
+    def route(self, tasks, role, budget=None):
+        """Backend que atenderá este pedido y el motivo (solo el router elige otro)."""
+        return self, ""
+
+    def classify(self, tasks, role, on_event=None, deadline=None, timeout=None):
+        raise NotImplementedError
+
+    async def aclassify(self, tasks, role, deadline=None, timeout=None):
+        return self.classify(tasks, role, deadline=deadline, timeout=timeout)
+
+
+class RulesBackend(Backend):
+    name = "reglas"
+    model_name = "reglas"
+
+    def classify(self, tasks, role, on_event=None, deadline=None, timeout=None):
+        result = classify_rules(tasks, role)
+        if on_event:
+            emit_result(result, on_event)
+        return result
+
+
+class SimulatedBackend(RulesBackend):
+    """Reemplazo del modelo para pruebas de carga: reglas locales + una latencia fija."""
+
+    name = "simulado"
+    model_name = "simulado"
+
+    def __init__(self, latency=None):
+        self.latency = float(os.environ.get("PRIORIZADOR_SIM_LATENCY", 0.5)) if latency is None else latency
+
+    def classify(self, tasks, role, on_event=None, deadline=None, timeout=None):
+        time.sleep(self.latency)
+        return super().classify(tasks, role, on_event)
+
+    async def aclassify(self, tasks, role, deadline=None, timeout=None):
+        await asyncio.sleep(self.latency)
+        return classify_rules(tasks, role)
+
+
+class ModelBackend(Backend):
+    """Un modelo de Google detrás del Pipeline (cachés, memoria, índice, destilado)."""
+
+    def __init__(self, name, model_name, api_key=None, hedge=None):
+        from priorizador.models import get_registry
+        from priorizador.pipeline import Pipeline
+
+        api_key = api_key or read_api_key()
+        if not api_key:
+            raise ConfigurationError("Falta GOOGLE_API_KEY (entorno o .streamlit/secrets.toml)")
+        self.name = name
+        self.pipeline = Pipeline(get_registry(api_key), model_name, hedge=hedge)
+        self.model_name = self.pipeline.scope
+
+    def classify(self, tasks, role, on_event=None, deadline=None, timeout=None):
+        try:
+            return self.pipeline.run(tasks, role, on_event, deadline=deadline, timeout=timeout)
+        except Exception as e:
+            raise _typed(e) from e
+
+    async def aclassify(self, tasks, role, deadline=None, timeout=None):
+        try:
+            return await self.pipeline.run_async(tasks, role, deadline=deadline, timeout=timeout)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            raise _typed(e) from e
+
+
+class RouterBackend(Backend):
+    """Elige Flash o Gemma en cada pedido (ver priorizador.router) y registra por qué."""
+
+    name = "auto"
+    model_name = "auto"
+
+    def __init__(self, api_key=None):
+        from priorizador.router import RouteLog
+
+        self.api_key = api_key
+        self.log = RouteLog()
+
+    def route(self, tasks, role, budget=None):
+        from priorizador.router import choose
+
+        decision = choose(tasks, role, budget)
+        self.log.record(decision, budget)
+        return get_backend(decision.backend, self.api_key), decision.reason
+
+    def classify(self, tasks, role, on_event=None, deadline=None, timeout=None):
+        backend, _ = self.route(tasks, role)
+        return backend.classify(tasks, role, on_event, deadline=deadline, timeout=timeout)
+
+    async def aclassify(self, tasks, role, deadline=None, timeout=None):
+        backend, _ = self.route(tasks, role)
+        return await backend.aclassify(tasks, role, deadline=deadline, timeout=timeout)
+
+
+class CascadeBackend(Backend):
+    """Gemma clasifica todo; solo las líneas de baja confianza van a Flash, en un pedido."""
+
+    name = "cascada"
+    model_name = "cascada"
+
+    def __init__(self, api_key=None, first="gemma", second="flash"):
+        self.api_key = api_key
+        self.first = first
+        self.second = second
+        self.lines = 0
+        self.escalated = 0
+
+    def _first_tier(self, lines, role, deadline, timeout):
+        try:
+            return get_backend(self.first, self.api_key).classify(lines, role, deadline=deadline, timeout=timeout)
+        except BackendError:
+            # Sin primer nivel, todo sube al segundo
+            return None
+
+    def _split(self, lines, role, first_tier):
+        from priorizador.cascade import split_by_confidence
+
+        accepted, escalate = split_by_confidence(lines, role, first_tier)
+        self.lines += len(lines)
+        self.escalated += len(escalate)
+        return accepted, escalate
+
+    def _second_model(self):
+        """(backend, modelo) del segundo nivel; el modelo es None si ese backend no usa uno."""
+        second = get_backend(self.second, self.api_key)
+        pipeline = getattr(second, "pipeline", None)
+        return second, None if pipeline is None else pipeline.models.get(pipeline.model_name)
+
+    def _second_tier(self, escalate, role, on_event, deadline, timeout):
+        from priorizador.engine import check_budget, classify
+        from priorizador.quota import reporting
+        from priorizador.streaming import classify_stream
+
+        second, model = self._second_model()
+        if model is None:
+            return second.classify(escalate, role, on_event, deadline=deadline, timeout=timeout)
+        # Todo lo que sube va en un solo pedido: sin el reparto en bloques ni el consejo aparte del Pipeline
+        check_budget(escalate)
+        deadline = deadline or second.pipeline.deadline
+        timeout = timeout or second.pipeline.timeout
+        try:
+            with reporting(on_event):
+                if on_event:
+                    return classify_stream(model, escalate, role, on_event, timeout=timeout, deadline=deadline)
+                return classify(model, escalate, role, timeout=timeout, deadline=deadline)
+        except Exception as e:
+            raise _typed(e) from e
+
+    async def _asecond_tier(self, escalate, role, deadline, timeout):
+        from priorizador.aio import classify_async
+        from priorizador.engine import check_budget
+        from priorizador.quota import within
+
+        second, model = self._second_model()
+        if model is None:
+            return await second.aclassify(escalate, role, deadline=deadline, timeout=timeout)
+        check_budget(escalate)
+        deadline = deadline or second.pipeline.deadline
+        timeout = timeout or second.pipeline.timeout
+        try:
+            with within(deadline):
+                return await asyncio.wait_for(classify_async(model, escalate, role, timeout), deadline)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            raise _typed(e) from e
+
+    def classify(self, tasks, role, on_event=None, deadline=None, timeout=None):
+        from priorizador.cache import split_tasks
+        from priorizador.cascade import emit_accepted, merge_cascade
+
+        lines = split_tasks(tasks)
+        first_tier = self._first_tier(lines, role, deadline, timeout)
+        accepted, escalate = self._split(lines, role, first_tier)
+        if on_event:
+            emit_accepted(accepted, on_event)
+        second_tier = None
+        if escalate:
+            second_tier = self._second_tier(escalate, role, on_event, deadline, timeout)
+        result = merge_cascade(lines, accepted, second_tier, (first_tier or {}).get("recomendacion_top", ""))
+        if on_event and second_tier is None:
+            on_event("tip", None, result["recomendacion_top"])
+        return result
+
+    async def aclassify(self, tasks, role, deadline=None, timeout=None):
+        from priorizador.cache import split_tasks
+        from priorizador.cascade import merge_cascade
+
+        lines = split_tasks(tasks)
+        try:
+            first_tier = await get_backend(self.first, self.api_key).aclassify(
+                lines, role, deadline=deadline, timeout=timeout
+            )
+        except BackendError:
+            first_tier = None
+        accepted, escalate = self._split(lines, role, first_tier)
+        second_tier = None
+        if escalate:
+            second_tier = await self._asecond_tier(escalate, role, deadline, timeout)
+        return merge_cascade(lines, accepted, second_tier, (first_tier or {}).get("recomendacion_top", ""))
+
+    def stats(self):
+        return {"lineas": self.lines, "escaladas": self.escalated}
+
+
+def _typed(error):
+    if isinstance(error, PriorizadorError):
+        return error
+    if isinstance(error, (TimeoutError, asyncio.TimeoutError)):
+        return DeadlineExceeded(str(error) or "Se agotó el plazo del análisis")
+    return BackendError(f"{type(error).__name__}: {error}")
+
+
+def _flash(api_key=None):
+    from priorizador.models import GEMINI_FLASH
+
+    return ModelBackend("flash", GEMINI_FLASH, api_key)
+
+
+def _gemma(api_key=None):
+    from priorizador.models import GEMMA_1B
+
+    return ModelBackend("gemma", GEMMA_1B, api_key)
+
+
+def _hedged(api_key=None):
+    # Flash como principal; si tarda más que su p95, Gemma corre en paralelo y gana el primero
+    from priorizador.models import GEMINI_FLASH, GEMMA_1B
+
+    return ModelBackend("cobertura", GEMINI_FLASH, api_key, hedge=GEMMA_1B)
+
+
+def _auto(api_key=None):
+    return RouterBackend(api_key or read_api_key())
+
+
+def _cascade(api_key=None):
+    return CascadeBackend(api_key or read_api_key())
+
+
+def _rules(api_key=None):
+    return RulesBackend()
+
+
+def _simulated(api_key=None):
+    return SimulatedBackend()
+
+
+# nombre -> fábrica(api_key=None)
+BACKENDS = {
+    "flash": _flash,
+    "gemma": _gemma,
+    "cobertura": _hedged,
+    "auto": _auto,
+    "cascada": _cascade,
+    "reglas": _rules,
+    "simulado": _simulated,
+}
+
+_instances = {}
+_instances_lock = threading.Lock()
+
+
+def register_backend(name, factory):
+    """Agrega un backend propio: `factory(api_key=None)` debe devolver un Backend."""
+    BACKENDS[name] = factory
+
+
+def get_backend(name, api_key=None):
+    """Instancia compartida por proceso para ese backend y clave."""
+    factory = BACKENDS.get(name)
+    if factory is None:
+        raise ConfigurationError(f"Backend desconocido: {name} (opciones: {', '.join(BACKENDS)})")
+    with _instances_lock:
+        backend = _instances.get((name, api_key))
+        if backend is None:
+            backend = _instances[(name, api_key)] = factory(api_key=api_key)
+        return backend
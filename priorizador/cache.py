@@ -0,0 +1,165 @@
+"""Caché de resultados para el priorizador.
+
+Dos niveles: un LRU en memoria (rápido, por proceso) y un nivel en disco
+(SQLite) que sobrevive a reinicios. Ambos expiran por TTL y se recortan por
+tamaño.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_CACHE_DIR = os.environ.get("PRIORIZADOR_CACHE_DIR", os.path.join(".cache", "priorizador"))
+
+
+# --- NORMALIZACIÓN ---
+def normalize_text(text):
+    """Colapsa espacios y quita bordes."""
+    return " ".join(str(text).split())
+
+
+def normalize_role(role):
+    return normalize_text(role).casefold()
+
+
+def split_tasks(tasks):
+    """Convierte el texto del text_area en una lista de líneas limpias."""
+    if isinstance(tasks, str):
+        tasks = tasks.splitlines()
+    lines = []
+    for line in tasks:
+        line = normalize_text(line)
+        if line:
+            lines.append(line)
+    return lines
+
+
+def make_key(role, tasks, model_name, prompt_version):
+    """Clave de contenido: mismo rol + mismas tareas + mismo modelo/prompt => misma clave."""
+    payload = json.dumps(
+        {
+            "role": normalize_role(role),
+            "tasks": split_tasks(tasks),
+            "model": model_name,
+            "prompt": prompt_version,
+        },
+        ensure_ascii=False,
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+# --- CACHÉ EN DOS NIVELES ---
+class ResultCache:
+    """LRU en memoria + SQLite en disco, con TTL y límite de tamaño."""
+
+    def __init__(self, path=None, max_items=256, max_disk_items=5000, ttl=7 * 24 * 3600):
+        self.path = path or os.path.join(DEFAULT_CACHE_DIR, "results.sqlite3")
+        self.max_items = max_items
+        self.max_disk_items = max_disk_items
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()  # key -> (created, value)
+        self._lock = threading.Lock()
+        self._db = None
+        self._open_disk()
+
+    def _open_disk(self):
+        # Si el disco no está disponible (solo lectura, etc.) seguimos solo en memoria
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                " key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL, accessed REAL NOT NULL)"
+            )
+            self._db.commit()
+        except (OSError, sqlite3.Error):
+            self._db = None
+
+    def _expired(self, created, now):
+        return self.ttl is not None and now - created > self.ttl
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                created, value = entry
+                if not self._expired(created, now):
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    return json.loads(value)
+                del self._memory[key]
+
+            if self._db is not None:
+                try:
+                    row = self._db.execute(
+                        "SELECT value, created FROM results WHERE key = ?", (key,)
+                    ).fetchone()
+                    if row is not None:
+                        value, created = row
+                        if not self._expired(created, now):
+                            self._db.execute("UPDATE results SET accessed = ? WHERE key = ?", (now, key))
+                            self._db.commit()
+                            self._remember(key, created, value)
+                            self.hits += 1
+                            return json.loads(value)
+                        self._db.execute("DELETE FROM results WHERE key = ?", (key,))
+                        self._db.commit()
+                except sqlite3.Error:
+                    pass
+
+            self.misses += 1
+            return None
+
+    def set(self, key, result):
+        now = time.time()
+        value = json.dumps(result, ensure_ascii=False)
+        with self._lock:
+            self._remember(key, now, value)
+            if self._db is not None:
+                try:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO results (key, value, created, accessed) VALUES (?, ?, ?, ?)",
+                        (key, value, now, now),
+                    )
+                    self._evict_disk(now)
+                    self._db.commit()
+                except sqlite3.Error:
+                    pass
+
+    def _remember(self, key, created, value):
+        self._memory[key] = (created, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_items:
+            self._memory.popitem(last=False)
+
+    def _evict_disk(self, now):
+        if self.ttl is not None:
+            self._db.execute("DELETE FROM results WHERE created < ?", (now - self.ttl,))
+        # Recorte por tamaño: se van los menos usados recientemente
+        self._db.execute(
+            "DELETE FROM results WHERE key IN ("
+            " SELECT key FROM results ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+            (self.max_disk_items,),
+        )
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                try:
+                    self._db.execute("DELETE FROM results")
+                    self._db.commit()
+                except sqlite3.Error:
+                    pass
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "memory_items": len(self._memory)}
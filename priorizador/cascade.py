@@ -0,0 +1,60 @@
+"""Cascada: un modelo barato clasifica todo y solo lo dudoso sube a Flash.
+
+La confianza de cada línea sale de comparar la respuesta del primer nivel
+(Gemma) con las reglas locales: si coinciden, la línea queda; si las reglas ven
+otra cosa con claridad, la línea sube. Las líneas que Gemma no devolvió (o
+reescribió) también suben. Todo lo que sube va a Flash en un solo pedido.
+"""
+from priorizador.engine import assign_lines, merge_result
+from priorizador.rules import classify_line
+
+# Desde esta confianza una línea del primer nivel se acepta sin consultar a Flash
+CASCADE_THRESHOLD = 0.7
+# Gemma y las reglas dicen lo mismo
+AGREEMENT_CONFIDENCE = 0.9
+# Las reglas no ven señales: solo cuenta la palabra de Gemma
+FIRST_TIER_CONFIDENCE = 0.7
+# Desde esta confianza las reglas "ven" algo en la tarea
+RULES_SIGNAL = 0.5
+
+
+def line_confidence(line, role, quadrant):
+    """Confianza en que `quadrant` (del primer nivel) es correcto para `line`."""
+    if quadrant is None:
+        return 0.0
+    expected, confidence = classify_line(line, role)
+    if expected == quadrant:
+        return max(AGREEMENT_CONFIDENCE, confidence)
+    if confidence < RULES_SIGNAL:
+        return FIRST_TIER_CONFIDENCE
+    # Las reglas ven otro cuadrante: mientras más seguras, menos vale la respuesta barata
+    return 1 - confidence
+
+
+def split_by_confidence(lines, role, first_tier, threshold=CASCADE_THRESHOLD):
+    """Separa ({línea: cuadrante} aceptadas, [líneas que suben a Flash]) a partir del primer nivel."""
+    assigned = assign_lines(lines, first_tier) if first_tier else {}
+    accepted, escalate = {}, []
+    for line in lines:
+        quadrant = assigned.get(line)
+        if line_confidence(line, role, quadrant) >= threshold:
+            accepted[line] = quadrant
+        else:
+            escalate.append(line)
+    return accepted, escalate
+
+
+def merge_cascade(lines, accepted, escalated_result=None, first_tip=""):
+    """Matriz estándar: lo aceptado del primer nivel + la respuesta de Flash para el resto.
+
+    El consejo es el de Flash; si nada subió, el del primer nivel.
+    """
+    assigned = dict(accepted)
+    if escalated_result:
+        assigned.update(assign_lines([line for line in lines if line not in accepted], escalated_result))
+    return merge_result(lines, assigned, escalated_result or {"recomendacion_top": first_tip})
+
+
+def emit_accepted(accepted, on_event):
+    for line, quadrant in accepted.items():
+        on_event("task", quadrant, line)
@@ -0,0 +1,177 @@
+"""Priorización batch desde la línea de comandos.
+
+Lee muchos registros (rol, tareas) desde JSONL o CSV, los clasifica con el
+mismo motor que la página y escribe un JSON por línea a medida que cada uno
+termina.
+
+    python -m priorizador --input backlogs.jsonl --output resultados.jsonl --workers 8 --rate 2
+
+Formato JSONL: {"id": "...", "rol": "...", "tareas": "línea 1\\nlínea 2"}
+("role"/"tasks" también sirven; "tareas" puede ser una lista).
+Formato CSV: columnas id, rol y tareas (tareas separadas por saltos de línea).
+
+Con --journal el avance queda en una bitácora append-only; si el proceso se
+cae (o se acaba la cuota), volver a correr el mismo comando salta lo ya
+terminado y no vuelve a pagar contenido ya clasificado.
+"""
+import argparse
+import csv
+import json
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from priorizador.backends import BACKENDS, get_backend
+from priorizador.cache import make_key
+from priorizador.engine import PROMPT_VERSION
+from priorizador.errors import ConfigurationError
+from priorizador.journal import Journal
+
+
+def _record(raw, number):
+    tasks = raw.get("tareas", raw.get("tasks", ""))
+    if isinstance(tasks, list):
+        tasks = "\n".join(str(task) for task in tasks)
+    return {
+        "id": str(raw["id"]) if raw.get("id") not in (None, "") else str(number),
+        "role": raw.get("rol") or raw.get("role") or "Profesional ocupado",
+        "tasks": tasks or "",
+    }
+
+
+def iter_records(handle, fmt):
+    """Registros {id, role, tasks} del archivo, de a uno (sin cargarlo entero)."""
+    if fmt == "csv":
+        for number, row in enumerate(csv.DictReader(handle), 1):
+            yield _record({key.strip().lower(): value for key, value in row.items() if key}, number)
+        return
+    for number, line in enumerate(handle, 1):
+        line = line.strip()
+        if line:
+            yield _record(json.loads(line), number)
+
+
+class RateLimiter:
+    """Espacia los inicios de registro para no pasar de `rate` por segundo."""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(self._next, now)
+            self._next = slot + self.interval
+        time.sleep(max(slot - now, 0))
+
+
+def process(record, classify, limiter):
+    limiter.wait()
+    started = time.monotonic()
+    try:
+        result = classify(record["tasks"], record["role"])
+        output = {"id": record["id"], "rol": record["role"], "resultado": result}
+    except Exception as e:
+        output = {"id": record["id"], "rol": record["role"], "error": f"{type(e).__name__}: {e}"}
+    output["segundos"] = round(time.monotonic() - started, 3)
+    return output
+
+
+def run(records, classify, out, workers=4, rate=None, journal=None, model_name=""):
+    """Procesa `records` con un pool acotado y escribe cada resultado al terminar.
+
+    Con `journal`, cada salida exitosa queda registrada antes de escribirse, y
+    los registros ya presentes en la bitácora se saltan (reanudación).
+    Devuelve (procesados, con_error, saltados).
+    """
+    limiter = RateLimiter(rate)
+    done = failed = skipped = 0
+
+    def emit(output, record, key):
+        nonlocal done, failed
+        if journal is not None and "error" not in output:
+            journal.record(record["id"], key, output["resultado"])
+        out.write(json.dumps(output, ensure_ascii=False) + "\n")
+        out.flush()
+        done += 1
+        failed += "error" in output
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        in_flight = {}
+        records = iter(records)
+        exhausted = False
+        while in_flight or not exhausted:
+            # Ventana acotada: no se encolan miles de registros en memoria
+            while not exhausted and len(in_flight) < workers * 2:
+                record = next(records, None)
+                if record is None:
+                    exhausted = True
+                    break
+                key = make_key(record["role"], record["tasks"], model_name, PROMPT_VERSION)
+                if journal is not None:
+                    if journal.is_done(record["id"]):
+                        skipped += 1
+                        continue
+                    paid = journal.lookup(key)
+                    if paid is not None:
+                        # Mismo contenido que otro registro ya procesado: no se vuelve a pagar
+                        emit({"id": record["id"], "rol": record["role"], "resultado": paid, "segundos": 0}, record, key)
+                        continue
+                future = pool.submit(process, record, classify, limiter)
+                in_flight[future] = (record, key)
+            if not in_flight:
+                break
+            finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in finished:
+                record, key = in_flight.pop(future)
+                emit(future.result(), record, key)
+    return done, failed, skipped
+
+
+def build_classifier(backend_name):
+    """Devuelve (función de clasificación, nombre del modelo para las claves)."""
+    try:
+        backend = get_backend(backend_name)
+    except ConfigurationError as e:
+        raise SystemExit(str(e))
+    return backend.classify, backend.model_name
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m priorizador", description="Prioriza muchas listas de tareas.")
+    parser.add_argument("--input", "-i", default="-", help="Archivo JSONL o CSV ('-' = stdin)")
+    parser.add_argument("--output", "-o", default="-", help="Archivo JSONL de salida ('-' = stdout)")
+    parser.add_argument("--format", choices=("jsonl", "csv"), help="Por defecto se deduce de la extensión")
+    parser.add_argument("--workers", "-w", type=int, default=4, help="Registros en paralelo")
+    parser.add_argument("--rate", type=float, default=None, help="Máximo de registros iniciados por segundo")
+    parser.add_argument("--backend", "-b", choices=sorted(BACKENDS), default="flash",
+                        help="flash = Gemini 2.5 Flash, gemma = Gemma 3 1B, reglas = clasificador local")
+    parser.add_argument("--journal", "-j", default=None,
+                        help="Bitácora JSONL de avance; si ya existe, el trabajo se reanuda desde ahí")
+    args = parser.parse_args(argv)
+
+    fmt = args.format or ("csv" if args.input.lower().endswith(".csv") else "jsonl")
+    classify, model_name = build_classifier(args.backend)
+    journal = Journal(args.journal) if args.journal else None
+    if journal is not None and len(journal):
+        print(f"Reanudando: {len(journal)} registros ya terminados en {args.journal}", file=sys.stderr)
+    source = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8", newline="")
+    out = sys.stdout if args.output == "-" else open(args.output, "a", encoding="utf-8")
+    try:
+        done, failed, skipped = run(
+            iter_records(source, fmt), classify, out, args.workers, args.rate, journal, model_name
+        )
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if out is not sys.stdout:
+            out.close()
+        if journal is not None:
+            journal.close()
+    print(f"{done} registros procesados, {failed} con error, {skipped} ya estaban terminados", file=sys.stderr)
+    return 1 if failed else 0
@@ -0,0 +1,120 @@
+"""Instrucciones fijas fuera de cada pedido: system instruction y caché de contexto.
+
+Las instrucciones de la matriz y el formato JSON son iguales en todas las
+llamadas; solo cambian el rol y las tareas. Aquí se arma, por modelo y versión
+de prompt, un modelo que ya las trae, así cada pedido lleva solo la parte
+variable (`engine.build_prompt(..., model=model)`):
+
+- Gemini: caché de contexto del proveedor (CachedContent), compartida entre
+  procesos por su nombre. Solo se intenta si las instrucciones llegan al mínimo
+  de tokens que el proveedor acepta en una caché explícita; si no (el caso de
+  hoy) o si falla, se usa system instruction, que el proveedor reutiliza con su
+  caché implícita.
+- Modelos sin system instruction (Gemma), o PRIORIZADOR_CONTEXT=local para
+  pruebas: `LocalContextModel` antepone las instrucciones en el proceso.
+"""
+import datetime
+import os
+import time
+
+from priorizador.engine import PROMPT_VERSION, system_instruction
+from priorizador.tokens import estimate_tokens
+
+# Vida de la caché del proveedor (segundos); se renueva un poco antes de vencer
+CONTEXT_TTL = 3600
+RENEW_MARGIN = 60
+# Tamaño mínimo de una caché explícita en Gemini 2.5 Flash; por debajo el proveedor la rechaza
+PROVIDER_MIN_TOKENS = 1024
+# "proveedor" (por defecto), "instruccion" (solo system instruction) o "local"
+CONTEXT_MODE = os.environ.get("PRIORIZADOR_CONTEXT", "proveedor")
+
+
+def supports_system_instruction(model_name):
+    return "gemma" not in model_name
+
+
+def cache_name(model_name, version=PROMPT_VERSION):
+    """Nombre estable de la caché: mismo modelo + misma versión de prompt => misma caché."""
+    return f"priorizador-{model_name.rsplit('/', 1)[-1]}-v{version}"
+
+
+class ContextModel:
+    """Modelo que ya trae las instrucciones fijas; `expires` es hora de reloj (None = no vence)."""
+
+    has_context = True
+
+    def __init__(self, model, kind, expires=None):
+        self._model = model
+        self.kind = kind
+        self.expires = expires
+
+    def __getattr__(self, name):
+        return getattr(self._model, name)
+
+    @property
+    def expired(self):
+        return self.expires is not None and time.time() > self.expires - RENEW_MARGIN
+
+    def generate_content(self, contents, **kwargs):
+        return self._model.generate_content(contents, **kwargs)
+
+    async def generate_content_async(self, contents, **kwargs):
+        return await self._model.generate_content_async(contents, **kwargs)
+
+
+class LocalContextModel(ContextModel):
+    """Reemplazo local de la caché: antepone las instrucciones a cada pedido."""
+
+    def __init__(self, model, instructions):
+        super().__init__(model, "local")
+        self.instructions = instructions
+
+    def _join(self, contents):
+        return f"{self.instructions}\n{contents}"
+
+    def generate_content(self, contents, **kwargs):
+        return self._model.generate_content(self._join(contents), **kwargs)
+
+    async def generate_content_async(self, contents, **kwargs):
+        return await self._model.generate_content_async(self._join(contents), **kwargs)
+
+
+def _provider_cache(genai, model_name, instructions, ttl):
+    from google.generativeai import caching
+
+    name = cache_name(model_name)
+    # Otro proceso pudo haberla creado ya con la misma versión de prompt (y no está por vencer)
+    for cached in caching.CachedContent.list():
+        if (
+            cached.display_name == name
+            and cached.model.endswith(model_name.rsplit("/", 1)[-1])
+            and cached.expire_time.timestamp() > time.time() + RENEW_MARGIN
+        ):
+            break
+    else:
+        cached = caching.CachedContent.create(
+            model=model_name,
+            display_name=name,
+            system_instruction=instructions,
+            ttl=datetime.timedelta(seconds=ttl),
+        )
+    model = genai.GenerativeModel.from_cached_content(cached_content=cached)
+    return ContextModel(model, "proveedor", cached.expire_time.timestamp())
+
+
+def context_model(genai, model_name, mode=CONTEXT_MODE, ttl=CONTEXT_TTL):
+    """GenerativeModel con las instrucciones fijas ya cargadas, según `mode` y lo que acepte el modelo.
+
+    Con mode="proveedor" puede hacer llamadas de red: no llamar con candados tomados.
+    """
+    instructions = system_instruction()
+    if mode == "local" or not supports_system_instruction(model_name):
+        return LocalContextModel(genai.GenerativeModel(model_name), instructions)
+    # Bajo el mínimo la caché explícita siempre falla: ni se intenta (ni se gastan llamadas)
+    if mode == "proveedor" and estimate_tokens(instructions) >= PROVIDER_MIN_TOKENS:
+        try:
+            return _provider_cache(genai, model_name, instructions, ttl)
+        except Exception:
+            # Caché no disponible (plan, versión de la librería, red): system instruction
+            pass
+    return ContextModel(genai.GenerativeModel(model_name, system_instruction=instructions), "instruccion")
@@ -0,0 +1,217 @@
+"""Clasificador local destilado de las clasificaciones pasadas de Gemini.
+
+El corpus sale de la memoria por tarea (`TaskMemo`): cada fila es
+(rol, línea, cuadrante) tal como lo decidió el modelo. Con eso se entrena un
+clasificador lineal (regresión logística multinomial) sobre features TF-IDF
+con hashing, todo en NumPy. En producción, las líneas con confianza alta no
+viajan a la API; solo las dudosas.
+
+Uso:
+    python -m priorizador.distill --memo .cache/priorizador/tasks.sqlite3 --out .cache/priorizador/distilled.npz
+"""
+import argparse
+import os
+import random
+import zlib
+
+import numpy as np
+
+from priorizador.cache import DEFAULT_CACHE_DIR
+from priorizador.engine import PROMPT_VERSION, QUADRANTS
+from priorizador.memo import TaskMemo
+from priorizador.models import GEMINI_FLASH
+from priorizador.rules import fold
+
+N_FEATURES = 2 ** 14
+DEFAULT_MODEL_PATH = os.path.join(DEFAULT_CACHE_DIR, "distilled.npz")
+# Por debajo de esta confianza la línea se manda a Gemini
+CONFIDENCE_THRESHOLD = 0.85
+
+
+# --- FEATURES ---
+def tokens(role, line):
+    words = fold(line).split()
+    feats = [f"w:{word}" for word in words]
+    feats += [f"b:{a}_{b}" for a, b in zip(words, words[1:])]
+    # El rol cruza con cada palabra para que el mismo texto pueda caer distinto según el cargo
+    role_words = fold(role).split()
+    feats += [f"r:{word}" for word in role_words]
+    feats += [f"rw:{r}|{word}" for r in role_words[:3] for word in words]
+    return feats
+
+
+def hashed_counts(role, line):
+    """Índices y conteos de features hasheadas (estable entre procesos, a diferencia de hash())."""
+    counts = {}
+    for token in tokens(role, line):
+        index = zlib.crc32(token.encode("utf-8")) % N_FEATURES
+        counts[index] = counts.get(index, 0) + 1
+    return counts
+
+
+def _vectorize(rows, idf):
+    """rows = [(rol, línea)] -> matriz densa TF-IDF normalizada (n x N_FEATURES)."""
+    matrix = np.zeros((len(rows), N_FEATURES), dtype=np.float32)
+    for i, (role, line) in enumerate(rows):
+        counts = hashed_counts(role, line)
+        if counts:
+            matrix[i, list(counts)] = np.log1p(np.fromiter(counts.values(), dtype=np.float32))
+    matrix *= idf
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    np.divide(matrix, norms, out=matrix, where=norms > 0)
+    return matrix
+
+
+def _softmax(scores):
+    scores = scores - scores.max(axis=1, keepdims=True)
+    np.exp(scores, out=scores)
+    scores /= scores.sum(axis=1, keepdims=True)
+    return scores
+
+
+# --- MODELO ---
+class DistilledClassifier:
+    def __init__(self, weights, bias, idf):
+        self.weights = weights
+        self.bias = bias
+        self.idf = idf
+
+    @classmethod
+    def train(cls, samples, epochs=30, learning_rate=20.0, l2=1e-5, batch_size=256, seed=0):
+        """samples = [(rol, línea, cuadrante)]."""
+        samples = [s for s in samples if s[2] in QUADRANTS]
+        if not samples:
+            raise ValueError("No hay ejemplos para entrenar")
+        labels = np.array([QUADRANTS.index(s[2]) for s in samples])
+
+        # IDF suavizado sobre el corpus de entrenamiento
+        document_freq = np.zeros(N_FEATURES, dtype=np.float32)
+        for role, line, _ in samples:
+            document_freq[list(hashed_counts(role, line))] += 1
+        idf = (np.log((1 + len(samples)) / (1 + document_freq)) + 1).astype(np.float32)
+
+        rng = np.random.default_rng(seed)
+        weights = np.zeros((N_FEATURES, len(QUADRANTS)), dtype=np.float32)
+        bias = np.zeros(len(QUADRANTS), dtype=np.float32)
+        rows = [(role, line) for role, line, _ in samples]
+        for _ in range(epochs):
+            order = rng.permutation(len(samples))
+            for start in range(0, len(order), batch_size):
+                batch = order[start:start + batch_size]
+                x = _vectorize([rows[i] for i in batch], idf)
+                probs = _softmax(x @ weights + bias)
+                probs[np.arange(len(batch)), labels[batch]] -= 1
+                probs /= len(batch)
+                weights -= learning_rate * (x.T @ probs + l2 * weights)
+                bias -= learning_rate * probs.sum(axis=0)
+        return cls(weights, bias, idf)
+
+    def predict_proba(self, role, lines, batch_size=1024):
+        out = []
+        for start in range(0, len(lines), batch_size):
+            x = _vectorize([(role, line) for line in lines[start:start + batch_size]], self.idf)
+            out.append(_softmax(x @ self.weights + self.bias))
+        if not out:
+            return np.zeros((0, len(QUADRANTS)), dtype=np.float32)
+        return np.vstack(out)
+
+    def predict(self, role, lines):
+        """Devuelve [(cuadrante, confianza)] en el mismo orden que `lines`."""
+        probs = self.predict_proba(role, lines)
+        best = probs.argmax(axis=1)
+        return [(QUADRANTS[i], float(probs[row, i])) for row, i in enumerate(best)]
+
+    def split_confident(self, role, lines, threshold=CONFIDENCE_THRESHOLD):
+        """Separa las líneas en ({línea: cuadrante} seguras, [líneas dudosas])."""
+        confident, uncertain = {}, []
+        for line, (quadrant, confidence) in zip(lines, self.predict(role, lines)):
+            if confidence >= threshold:
+                confident[line] = quadrant
+            else:
+                uncertain.append(line)
+        return confident, uncertain
+
+    def save(self, path=DEFAULT_MODEL_PATH):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        np.savez_compressed(path, weights=self.weights, bias=self.bias, idf=self.idf, n_features=N_FEATURES)
+
+    @classmethod
+    def load(cls, path=DEFAULT_MODEL_PATH):
+        with np.load(path) as data:
+            if int(data["n_features"]) != N_FEATURES:
+                raise ValueError("El modelo guardado usa otra cantidad de features")
+            return cls(data["weights"], data["bias"], data["idf"])
+
+
+def load_if_available(path=DEFAULT_MODEL_PATH):
+    try:
+        return DistilledClassifier.load(path)
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+# --- CORPUS Y EVALUACIÓN ---
+def load_corpus(memo_path=None, model_name=GEMINI_FLASH, prompt_version=PROMPT_VERSION):
+    """Lee (rol, línea, cuadrante) de TaskMemo, solo lo que clasificó `model_name` con el prompt vigente.
+
+    Las etiquetas de Gemma, de la cobertura Flash+Gemma o de prompts anteriores no
+    son las de Gemini que se quieren imitar.
+    """
+    memo_path = memo_path or os.path.join(DEFAULT_CACHE_DIR, "tasks.sqlite3")
+    return list(TaskMemo(memo_path).iter_all(model_name, prompt_version))
+
+
+def split_holdout(samples, fraction=0.2, seed=0):
+    samples = list(samples)
+    random.Random(seed).shuffle(samples)
+    cut = int(len(samples) * (1 - fraction))
+    return samples[:cut], samples[cut:]
+
+
+def evaluate(model, samples, threshold=CONFIDENCE_THRESHOLD):
+    """Exactitud global, cobertura (líneas que se saltarían la API) y exactitud en esas líneas."""
+    if not samples:
+        return {"n": 0}
+    by_role = {}
+    for index, (role, line, _) in enumerate(samples):
+        by_role.setdefault(role, []).append((index, line))
+    predictions = [None] * len(samples)
+    for role, items in by_role.items():
+        for (index, _), prediction in zip(items, model.predict(role, [line for _, line in items])):
+            predictions[index] = prediction
+
+    correct = [quadrant == sample[2] for sample, (quadrant, _) in zip(samples, predictions)]
+    confident = [confidence >= threshold for _, confidence in predictions]
+    covered = sum(confident)
+    return {
+        "n": len(samples),
+        "accuracy": sum(correct) / len(samples),
+        "coverage": covered / len(samples),
+        "confident_accuracy": (sum(c for c, k in zip(correct, confident) if k) / covered) if covered else None,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Entrena el clasificador local a partir de la memoria de tareas.")
+    parser.add_argument("--memo", default=None, help="Base SQLite de TaskMemo")
+    parser.add_argument("--out", default=DEFAULT_MODEL_PATH, help="Archivo .npz de salida")
+    parser.add_argument("--holdout", type=float, default=0.2, help="Fracción reservada para evaluar")
+    parser.add_argument("--epochs", type=int, default=30)
+    parser.add_argument("--threshold", type=float, default=CONFIDENCE_THRESHOLD)
+    args = parser.parse_args(argv)
+
+    corpus = load_corpus(args.memo)
+    train, test = split_holdout(corpus, args.holdout)
+    model = DistilledClassifier.train(train, epochs=args.epochs)
+    print(f"Entrenado con {len(train)} ejemplos; evaluación: {evaluate(model, test, args.threshold)}")
+    # El modelo final usa todo el corpus
+    if test:
+        model = DistilledClassifier.train(corpus, epochs=args.epochs)
+    model.save(args.out)
+    print(f"Modelo guardado en {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,329 @@
+"""Prompt, llamada al modelo y armado de la Matriz de Eisenhower."""
+import json
+import math
+import time
+
+from priorizador.cache import normalize_text, split_tasks
+from priorizador.errors import ResponseFormatError, TokenBudgetExceeded
+from priorizador.latency import TRACKER
+from priorizador.quota import within
+from priorizador.retry import DEFAULT_POLICY
+from priorizador.tokens import estimate_tokens
+
+QUADRANTS = ("hacer", "planificar", "delegar", "eliminar")
+# Salida compacta: las tareas van numeradas y el modelo responde solo con números,
+# que se traducen al texto original aquí (menos tokens de salida, texto exacto)
+COMPACT_OUTPUT = True
+# Subir esta versión cada vez que cambie el prompt, así no se reutilizan resultados viejos
+PROMPT_VERSION = "4" if COMPACT_OUTPUT else "4-texto"
+
+# Listas largas se parten en bloques que se clasifican en paralelo
+CHUNK_MIN_SIZE = 15
+CHUNK_MAX_SIZE = 40
+MAX_WORKERS = 4
+
+# Presupuestos de tokens (estimados localmente, ver priorizador.tokens):
+# por llamada se parte en bloques más chicos; por tarea o por lista se rechaza
+MAX_PROMPT_TOKENS = 3000
+MAX_OUTPUT_TOKENS = 1500
+MAX_TASK_TOKENS = 250
+MAX_LIST_TOKENS = 100_000
+# Llaves del JSON y consejo, en cualquier respuesta
+BASE_OUTPUT_TOKENS = 60
+
+
+def emit_result(result, on_event, tip=True):
+    """Informa una matriz ya armada: on_event("task", cuadrante, tarea) por tarea y, con `tip`, el consejo."""
+    for quadrant in QUADRANTS:
+        for task in result.get(quadrant, []):
+            on_event("task", quadrant, task)
+    if tip:
+        on_event("tip", None, result.get("recomendacion_top", ""))
+
+
+def system_instruction(compact=COMPACT_OUTPUT):
+    """Parte fija de todos los pedidos (va como system instruction o en la caché de contexto)."""
+    if compact:
+        answer = (
+            "responde solo JSON con los números de las tareas, cada uno en un solo cuadrante: "
+            '{"hacer":[1],"planificar":[2],"delegar":[3],"eliminar":[4],'
+            '"recomendacion_top":"consejo de una frase sobre el foco de hoy"}'
+        )
+    else:
+        answer = (
+            "responde solo JSON con el texto exacto de cada tarea: "
+            '{"hacer":["tarea"],"planificar":[],"delegar":[],"eliminar":[],'
+            '"recomendacion_top":"consejo de una frase sobre el foco de hoy"}'
+        )
+    return (
+        "Eres experto en productividad y clasificas tareas en la Matriz de Eisenhower según el rol indicado.\n"
+        f"Si recibes TAREAS, {answer}\n"
+        "Si recibes HACER YA y PLANIFICAR, responde solo con un consejo breve de una frase sobre el foco de hoy."
+    )
+
+
+def _with_instruction(request, model, compact=COMPACT_OUTPUT):
+    # Los modelos del registro ya traen la parte fija (ver priorizador.context)
+    if getattr(model, "has_context", False):
+        return request
+    return f"{system_instruction(compact)}\n{request}"
+
+
+def build_prompt(tasks, role, compact=COMPACT_OUTPUT, model=None):
+    """Prompt mínimo y canónico; con un `model` que ya trae las instrucciones, solo la parte variable."""
+    lines = split_tasks(tasks)
+    if compact:
+        task_text = "\n".join(f"{number}. {line}" for number, line in enumerate(lines, 1))
+    else:
+        task_text = "\n".join(lines)
+    request = f'Rol: "{normalize_text(role)}"\nTAREAS:\n{task_text}'
+    return _with_instruction(request, model, compact)
+
+
+def _schema(item_type):
+    return {
+        "type": "OBJECT",
+        "properties": {
+            **{quadrant: {"type": "ARRAY", "items": {"type": item_type}} for quadrant in QUADRANTS},
+            "recomendacion_top": {"type": "STRING"},
+        },
+        "required": [*QUADRANTS, "recomendacion_top"],
+    }
+
+
+# Esquema para el modo de salida estructurada: el modelo solo puede devolver este objeto
+RESPONSE_SCHEMA = _schema("INTEGER" if COMPACT_OUTPUT else "STRING")
+
+
+def generation_config(model):
+    """Salida JSON con esquema cuando el modelo lo soporta (Gemma no tiene modo JSON)."""
+    if "gemma" in getattr(model, "model_name", ""):
+        return None
+    return {"response_mime_type": "application/json", "response_schema": RESPONSE_SCHEMA}
+
+
+def extract_json(text):
+    """Devuelve el primer objeto JSON balanceado dentro de `text`.
+
+    Tolera fences de markdown y prosa antes o después del objeto.
+    """
+    text = text.strip()
+    try:
+        return json.loads(text)
+    except ValueError:
+        pass
+
+    start = text.find("{")
+    while start != -1:
+        depth = 0
+        in_string = escape = False
+        for i in range(start, len(text)):
+            char = text[i]
+            if in_string:
+                if escape:
+                    escape = False
+                elif char == "\\":
+                    escape = True
+                elif char == '"':
+                    in_string = False
+            elif char == '"':
+                in_string = True
+            elif char == "{":
+                depth += 1
+            elif char == "}":
+                depth -= 1
+                if depth == 0:
+                    try:
+                        return json.loads(text[start:i + 1])
+                    except ValueError:
+                        break
+        start = text.find("{", start + 1)
+    raise ResponseFormatError("La respuesta del modelo no contiene un JSON válido")
+
+
+def resolve_item(item, lines):
+    """Número de tarea (1..n) -> texto original; cualquier otra cosa se deja como texto.
+
+    Devuelve None si es un número fuera de rango.
+    """
+    if lines is not None and not isinstance(item, bool):
+        if isinstance(item, str) and item.strip().isdigit():
+            item = int(item)
+        if isinstance(item, (int, float)) and float(item).is_integer():
+            index = int(item)
+            return lines[index - 1] if 1 <= index <= len(lines) else None
+    return str(item)
+
+
+def parse_response(text, lines=None):
+    """Dict de cuadrantes a partir del texto del modelo.
+
+    Con `lines` (las tareas tal como se numeraron en el prompt) los números se
+    traducen al texto original; cada tarea queda en el primer cuadrante que la nombra.
+    """
+    data = extract_json(text)
+    if not isinstance(data, dict):
+        raise ResponseFormatError("La respuesta del modelo no es un objeto JSON")
+    result = {}
+    seen = set()
+    for quadrant in QUADRANTS:
+        items = data.get(quadrant) or []
+        result[quadrant] = []
+        for item in items if isinstance(items, list) else [items]:
+            value = resolve_item(item, lines)
+            if value is None or (lines is not None and value in seen):
+                continue
+            seen.add(value)
+            result[quadrant].append(value)
+    result["recomendacion_top"] = str(data.get("recomendacion_top") or "")
+    return result
+
+
+def request_options(timeout):
+    return {"timeout": timeout} if timeout else None
+
+
+def call_timeout(timeout, limit):
+    """Plazo de una llamada: `timeout`, recortado a lo que queda hasta `limit` (hora monotónica)."""
+    if limit is None:
+        return timeout
+    remaining = limit - time.monotonic()
+    if remaining <= 0:
+        raise TimeoutError("Se superó el plazo del análisis")
+    return min(timeout or remaining, remaining)
+
+
+def classify(model, tasks, role, timeout=None, retry=DEFAULT_POLICY, deadline=None):
+    """Una llamada al modelo para las tareas dadas; devuelve el dict de cuadrantes.
+
+    Las fallas pasajeras (429, 5xx, plazo, JSON cortado) se reintentan según `retry`,
+    sin pasar de `deadline` segundos entre todos los intentos.
+    """
+    lines = split_tasks(tasks)
+    limit = None if deadline is None else time.monotonic() + deadline
+
+    def attempt():
+        response = model.generate_content(
+            build_prompt(lines, role, model=model),
+            generation_config=generation_config(model),
+            request_options=request_options(call_timeout(timeout, limit)),
+        )
+        return parse_response(response.text, lines)
+
+    started = time.monotonic()
+    try:
+        # Con ThrottledModel, el timeout de cada intento se recorta después de esperar cuota
+        with within(deadline):
+            result = retry.within(deadline).call(attempt)
+    except Exception:
+        TRACKER.record_error(getattr(model, "model_name", ""))
+        raise
+    TRACKER.record(getattr(model, "model_name", ""), time.monotonic() - started)
+    return result
+
+
+# --- LISTAS GRANDES: BLOQUES EN PARALELO ---
+def chunk_lines(lines, max_workers=MAX_WORKERS, min_size=CHUNK_MIN_SIZE, max_size=CHUNK_MAX_SIZE):
+    """Bloques de tamaño adaptativo: se reparten entre los workers sin bajar de `min_size`."""
+    size = min(max(math.ceil(len(lines) / max_workers), min_size), max_size)
+    return [lines[start:start + size] for start in range(0, len(lines), size)]
+
+
+# --- PRESUPUESTO DE TOKENS ---
+def output_tokens(lines, compact=COMPACT_OUTPUT):
+    """Tokens de salida esperados: un número por tarea en modo compacto, el texto completo si no."""
+    per_line = (lambda line: 2) if compact else (lambda line: estimate_tokens(line) + 2)
+    return BASE_OUTPUT_TOKENS + sum(per_line(line) for line in lines)
+
+
+def fits_one_call(lines, role):
+    """¿Cabe la lista en una sola llamada sin pasar los presupuestos por llamada?"""
+    return estimate_tokens(build_prompt(lines, role)) <= MAX_PROMPT_TOKENS and output_tokens(lines) <= MAX_OUTPUT_TOKENS
+
+
+def check_budget(lines):
+    """Rechaza (TokenBudgetExceeded) lo que no conviene enviar aunque se parta en bloques."""
+    total = 0
+    for line in lines:
+        tokens = estimate_tokens(line)
+        if tokens > MAX_TASK_TOKENS:
+            raise TokenBudgetExceeded(
+                f"Una tarea es demasiado larga (~{tokens} tokens, máximo {MAX_TASK_TOKENS}): {line[:60]}…"
+            )
+        total += tokens
+    if total > MAX_LIST_TOKENS:
+        raise TokenBudgetExceeded(f"La lista es demasiado grande (~{total} tokens, máximo {MAX_LIST_TOKENS})")
+
+
+def plan_chunks(lines, role, max_workers=MAX_WORKERS):
+    """Bloques de `chunk_lines`, partidos por la mitad hasta que cada uno quepa en una llamada."""
+    chunks = []
+    pending = chunk_lines(lines, max_workers)
+    while pending:
+        chunk = pending.pop(0)
+        if len(chunk) > 1 and not fits_one_call(chunk, role):
+            middle = len(chunk) // 2
+            pending[:0] = [chunk[:middle], chunk[middle:]]
+        else:
+            chunks.append(chunk)
+    return chunks
+
+
+def build_tip_prompt(result, role, model=None):
+    urgent = "\n".join(result.get("hacer", [])[:20]) or "(nada urgente)"
+    important = "\n".join(result.get("planificar", [])[:20]) or "(nada)"
+    request = f'Rol: "{normalize_text(role)}"\nHACER YA:\n{urgent}\nPLANIFICAR:\n{important}'
+    return _with_instruction(request, model)
+
+
+# --- ARMADO DEL RESULTADO ---
+def line_key(line):
+    return " ".join(str(line).split()).casefold()
+
+
+def assign_lines(lines, result):
+    """Mapea cada línea de entrada al cuadrante donde el modelo la devolvió.
+
+    Las líneas que el modelo reescribió no aparecen en el mapa.
+    """
+    by_key = {line_key(line): line for line in lines}
+    assigned = {}
+    for quadrant in QUADRANTS:
+        for item in result.get(quadrant) or []:
+            line = by_key.get(line_key(item))
+            if line is not None and line not in assigned:
+                assigned[line] = quadrant
+    return assigned
+
+
+def default_tip(result):
+    for quadrant in ("hacer", "planificar"):
+        if result.get(quadrant):
+            return f"Enfócate primero en: {result[quadrant][0]}"
+    return "Hoy no hay nada urgente: aprovecha para planificar."
+
+
+def merge_result(lines, assigned, partial=None):
+    """Arma la matriz respetando el orden original de las líneas.
+
+    `assigned` es línea -> cuadrante; `partial` es la respuesta cruda del modelo
+    (si hubo llamada), de donde se rescatan las tareas que no calzaron con
+    ninguna línea y el consejo.
+    """
+    result = {quadrant: [] for quadrant in QUADRANTS}
+    for line in lines:
+        quadrant = assigned.get(line)
+        if quadrant is not None:
+            result[quadrant].append(line)
+
+    if partial:
+        known = {line_key(line) for line in lines if line in assigned}
+        for quadrant in QUADRANTS:
+            for item in partial.get(quadrant) or []:
+                if line_key(item) not in known:
+                    result[quadrant].append(item)
+                    known.add(line_key(item))
+
+    tip = (partial or {}).get("recomendacion_top")
+    result["recomendacion_top"] = tip or default_tip(result)
+    return result
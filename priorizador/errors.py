@@ -0,0 +1,25 @@
+"""Errores del priorizador: la interfaz decide cómo mostrarlos."""
+
+
+class PriorizadorError(Exception):
+    """Base de todos los errores del motor."""
+
+
+class ConfigurationError(PriorizadorError):
+    """Falta configuración (por ejemplo, la API key) o el backend no existe."""
+
+
+class BackendError(PriorizadorError):
+    """El backend no pudo clasificar las tareas."""
+
+
+class ResponseFormatError(BackendError, ValueError):
+    """La respuesta del modelo no tiene el JSON esperado."""
+
+
+class DeadlineExceeded(BackendError, TimeoutError):
+    """Se agotó el plazo del análisis."""
+
+
+class TokenBudgetExceeded(PriorizadorError, ValueError):
+    """El pedido supera el presupuesto de tokens; se rechaza antes de llamar al modelo."""
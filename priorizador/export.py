@@ -0,0 +1,107 @@
+"""Exportación de la matriz a PDF y Excel.
+
+Los archivos se generan en un pool de hilos (fuera del hilo del script) y se
+guardan por hash del resultado, así descargar dos veces lo mismo no cuesta
+nada. El Excel usa el modo write-only de openpyxl para matrices grandes.
+"""
+import hashlib
+import io
+import json
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from priorizador.engine import QUADRANTS
+
+TITLES = {
+    "hacer": "1. HACER YA (Urgente e Importante)",
+    "planificar": "2. PLANIFICAR (No Urgente pero Importante)",
+    "delegar": "3. DELEGAR (Urgente pero No Importante)",
+    "eliminar": "4. ELIMINAR (Ni Urgente ni Importante)",
+}
+MIME_TYPES = {
+    "pdf": "application/pdf",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+
+def result_hash(result, role):
+    payload = json.dumps({"role": role, "result": result}, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def to_xlsx(result, role):
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Matriz")
+    sheet.append(["Rol", role])
+    sheet.append(["Consejo del Coach", result.get("recomendacion_top", "")])
+    sheet.append([])
+    sheet.append(["Cuadrante", "Tarea"])
+    for quadrant in QUADRANTS:
+        for task in result.get(quadrant, []):
+            sheet.append([TITLES[quadrant], task])
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+def _latin1(text):
+    # Las fuentes base de fpdf solo cubren latin-1: los emojis se reemplazan
+    return str(text).encode("latin-1", "replace").decode("latin-1")
+
+
+def to_pdf(result, role):
+    from fpdf import FPDF
+
+    pdf = FPDF()
+    pdf.set_auto_page_break(auto=True, margin=15)
+    pdf.add_page()
+    pdf.set_font("Helvetica", "B", 16)
+    pdf.cell(0, 10, _latin1("Matriz de Eisenhower"), ln=1)
+    pdf.set_font("Helvetica", "", 11)
+    pdf.cell(0, 8, _latin1(f"Rol: {role}"), ln=1)
+    for quadrant in QUADRANTS:
+        pdf.ln(4)
+        pdf.set_font("Helvetica", "B", 12)
+        pdf.cell(0, 8, _latin1(TITLES[quadrant]), ln=1)
+        pdf.set_font("Helvetica", "", 11)
+        tasks = result.get(quadrant, [])
+        for task in tasks:
+            pdf.multi_cell(0, 6, _latin1(f"- {task}"))
+        if not tasks:
+            pdf.multi_cell(0, 6, _latin1("Nada por aquí"))
+    pdf.ln(6)
+    pdf.set_font("Helvetica", "B", 11)
+    pdf.multi_cell(0, 6, _latin1(f"Consejo del Coach: {result.get('recomendacion_top', '')}"))
+    data = pdf.output(dest="S")
+    # fpdf 1.x devuelve str latin-1; fpdf2 devuelve bytearray
+    return data.encode("latin-1") if isinstance(data, str) else bytes(data)
+
+
+BUILDERS = {"pdf": to_pdf, "xlsx": to_xlsx}
+
+
+class Exporter:
+    """Genera exportaciones en segundo plano y recuerda las últimas por hash."""
+
+    def __init__(self, max_workers=2, max_items=64):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="priorizador-export")
+        self._jobs = OrderedDict()  # (hash, formato) -> Future
+        self._lock = threading.Lock()
+        self.max_items = max_items
+
+    def submit(self, result, role, fmt):
+        """Devuelve un Future con los bytes del archivo; si ya existe, el mismo Future."""
+        key = (result_hash(result, role), fmt)
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None and not (job.done() and job.exception() is not None):
+                self._jobs.move_to_end(key)
+                return job
+            job = self._pool.submit(BUILDERS[fmt], result, role)
+            self._jobs[key] = job
+            while len(self._jobs) > self.max_items:
+                self._jobs.popitem(last=False)
+            return job
@@ -0,0 +1,161 @@
+"""Importación masiva de tareas desde CSV o Excel.
+
+Los archivos se leen por partes (pandas con `chunksize`, openpyxl en modo
+solo lectura), así un backlog de miles de filas no se carga entero en memoria.
+Columnas opcionales: fecha de vencimiento, responsable y rol. Si la primera
+fila no nombra ninguna columna conocida, el archivo no tiene encabezado y la
+primera columna es la tarea.
+"""
+import csv
+import io
+import os
+
+from priorizador.cache import normalize_role, normalize_text
+from priorizador.engine import line_key
+
+CSV_CHUNK_ROWS = 1000
+# Lo que se mira para adivinar el separador; solo se aceptan estos
+CSV_SAMPLE_BYTES = 64 * 1024
+CSV_DELIMITERS = ",;\t"
+BATCH_SIZE = 50
+
+# Nombres aceptados para cada columna (se comparan en minúsculas)
+COLUMN_ALIASES = {
+    "tarea": ("tarea", "tareas", "task", "tasks", "descripcion", "descripción", "pendiente", "actividad"),
+    "vence": ("vence", "vencimiento", "fecha", "fecha limite", "fecha límite", "due", "due date", "plazo"),
+    "responsable": ("responsable", "owner", "dueño", "asignado", "encargado"),
+    "rol": ("rol", "role", "cargo"),
+}
+
+
+def _names(header):
+    return [normalize_text(name).casefold() if name is not None else "" for name in header]
+
+
+def _has_header(header):
+    """¿La primera fila nombra alguna columna conocida? Si no, ya es una tarea."""
+    known = {alias for aliases in COLUMN_ALIASES.values() for alias in aliases}
+    return any(name in known for name in _names(header))
+
+
+def _map_columns(header):
+    """Posición de cada columna conocida; si no hay columna de tarea, se usa la primera."""
+    names = _names(header)
+    mapping = {}
+    for field, aliases in COLUMN_ALIASES.items():
+        for position, name in enumerate(names):
+            if name in aliases:
+                mapping[field] = position
+                break
+    mapping.setdefault("tarea", 0)
+    return mapping
+
+
+def _row_dict(values, mapping):
+    row = {}
+    for field, position in mapping.items():
+        value = values[position] if position < len(values) else None
+        if value is None or (isinstance(value, float) and value != value):  # NaN de pandas
+            value = ""
+        if hasattr(value, "strftime"):
+            value = value.strftime("%d/%m/%Y")
+        row[field] = normalize_text(value)
+    return row
+
+
+def _sniff(source):
+    """(separador, primera fila) mirando el comienzo del archivo; solo `,` `;` o tabulación."""
+    sample = source.read(CSV_SAMPLE_BYTES)
+    source.seek(0)
+    if isinstance(sample, bytes):
+        sample = sample.decode("utf-8-sig", errors="replace")
+    sample = sample.lstrip("\ufeff")
+    try:
+        delimiter = csv.Sniffer().sniff(sample, delimiters=CSV_DELIMITERS).delimiter
+    except csv.Error:
+        # Una sola columna (una tarea por línea) no tiene separador que adivinar
+        delimiter = ","
+    first = next(csv.reader(io.StringIO(sample), delimiter=delimiter), [])
+    return delimiter, first
+
+
+def _iter_csv(source):
+    import pandas as pd
+
+    delimiter, first = _sniff(source)
+    header = _has_header(first)
+    chunks = pd.read_csv(source, chunksize=CSV_CHUNK_ROWS, dtype=str, sep=delimiter, encoding="utf-8-sig",
+                         header=0 if header else None, skip_blank_lines=True)
+    for chunk in chunks:
+        mapping = _map_columns(chunk.columns) if header else {"tarea": 0}
+        for values in chunk.itertuples(index=False, name=None):
+            yield _row_dict(values, mapping)
+
+
+def _iter_xlsx(source):
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(source, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        first = next(rows, None)
+        if first is None:
+            return
+        if _has_header(first):
+            mapping = _map_columns(first)
+        else:
+            mapping = {"tarea": 0}
+            yield _row_dict(first, mapping)
+        for values in rows:
+            yield _row_dict(values, mapping)
+    finally:
+        workbook.close()
+
+
+def iter_rows(source, filename):
+    """Filas del archivo como dicts con las claves tarea/vence/responsable/rol."""
+    extension = os.path.splitext(filename)[1].lower()
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+    if extension in (".xlsx", ".xlsm"):
+        return _iter_xlsx(source)
+    if extension in (".csv", ".txt"):
+        return _iter_csv(source)
+    raise ValueError(f"Formato no soportado: {extension or filename}")
+
+
+def task_text(row):
+    """Texto de la tarea con las pistas de plazo y responsable que ayudan a clasificar."""
+    text = row.get("tarea", "")
+    if row.get("vence"):
+        text += f" (vence {row['vence']})"
+    if row.get("responsable"):
+        text += f" (responsable: {row['responsable']})"
+    return text
+
+
+def iter_tasks(rows, default_role):
+    """(rol, texto) normalizados y sin duplicados, en el orden del archivo."""
+    seen = set()
+    for row in rows:
+        if not row.get("tarea"):
+            continue
+        role = row.get("rol") or default_role
+        text = task_text(row)
+        key = (normalize_role(role), line_key(text))
+        if key in seen:
+            continue
+        seen.add(key)
+        yield role, text
+
+
+def iter_batches(tasks, size=BATCH_SIZE):
+    """Agrupa (rol, texto) en lotes de un mismo rol: [(rol, [textos])]."""
+    pending = {}
+    for role, text in tasks:
+        batch = pending.setdefault(role, [])
+        batch.append(text)
+        if len(batch) >= size:
+            yield role, pending.pop(role)
+    for role, batch in pending.items():
+        yield role, batch
@@ -0,0 +1,95 @@
+"""Bitácora append-only para trabajos batch reanudables.
+
+Cada registro terminado se agrega como una línea JSON con su id, su clave de
+idempotencia (hash de rol + tareas + modelo + versión de prompt) y su salida.
+Al reanudar, los ids ya presentes se saltan y los registros con el mismo
+contenido que otro ya pagado reutilizan esa salida sin llamar a la API.
+"""
+import json
+import os
+import threading
+import time
+
+# Bytes que se leen por vez al buscar la última línea completa
+REPAIR_BLOCK = 64 * 1024
+
+
+class Journal:
+    def __init__(self, path, fsync=True):
+        self.path = path
+        self.fsync = fsync
+        self.ids = set()
+        self.by_key = {}
+        self._lock = threading.Lock()
+        self._load()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._repair()
+        self._handle = open(path, "a", encoding="utf-8")
+
+    def _repair(self):
+        # Una caída a mitad de escritura deja la última línea sin "\n": se corta hasta la
+        # última línea completa para que el próximo registro no quede pegado a ella
+        try:
+            handle = open(self.path, "rb+")
+        except FileNotFoundError:
+            return
+        with handle:
+            end = handle.seek(0, os.SEEK_END)
+            if end == 0:
+                return
+            handle.seek(end - 1)
+            if handle.read(1) == b"\n":
+                return
+            # Se busca hacia atrás, por bloques, el último fin de línea
+            position = end
+            while position > 0:
+                start = max(position - REPAIR_BLOCK, 0)
+                handle.seek(start)
+                newline = handle.read(position - start).rfind(b"\n")
+                if newline != -1:
+                    handle.truncate(start + newline + 1)
+                    return
+                position = start
+            handle.truncate(0)
+
+    def _load(self):
+        try:
+            handle = open(self.path, encoding="utf-8")
+        except FileNotFoundError:
+            return
+        with handle:
+            for line in handle:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # Línea cortada por una caída a mitad de escritura: se ignora
+                    continue
+                self.ids.add(entry["id"])
+                self.by_key[entry["key"]] = entry["output"]
+
+    def __len__(self):
+        return len(self.ids)
+
+    def is_done(self, record_id):
+        return record_id in self.ids
+
+    def lookup(self, key):
+        """Salida ya pagada para ese contenido, o None."""
+        return self.by_key.get(key)
+
+    def record(self, record_id, key, output):
+        entry = {"id": record_id, "key": key, "output": output, "ts": round(time.time(), 3)}
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        with self._lock:
+            self._handle.write(line)
+            self._handle.flush()
+            if self.fsync:
+                os.fsync(self._handle.fileno())
+            self.ids.add(record_id)
+            self.by_key[key] = output
+
+    def close(self):
+        with self._lock:
+            self._handle.close()
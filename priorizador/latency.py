@@ -0,0 +1,71 @@
+"""Latencias y errores recientes de cada modelo (ventana deslizante) para decidir plazos y rutas."""
+import threading
+from collections import deque
+
+# Muestras que se guardan por modelo
+WINDOW = 200
+# Con menos muestras que esto, los percentiles no se consideran confiables
+MIN_SAMPLES = 10
+
+
+def canonical_name(name):
+    """Nombre como lo informa el SDK: "gemini-2.5-flash" y "models/gemini-2.5-flash" son el mismo modelo."""
+    name = name or ""
+    return name if not name or name.startswith(("models/", "tunedModels/")) else f"models/{name}"
+
+
+class LatencyTracker:
+    def __init__(self, window=WINDOW, min_samples=MIN_SAMPLES):
+        self.window = window
+        self.min_samples = min_samples
+        self._samples = {}  # modelo -> deque de segundos (solo llamadas exitosas)
+        self._outcomes = {}  # modelo -> deque de True (ok) / False (error)
+        self._lock = threading.Lock()
+
+    def _deque(self, table, name):
+        name = canonical_name(name)
+        values = table.get(name)
+        if values is None:
+            values = table[name] = deque(maxlen=self.window)
+        return values
+
+    def record(self, name, seconds):
+        with self._lock:
+            self._deque(self._samples, name).append(seconds)
+            self._deque(self._outcomes, name).append(True)
+
+    def record_error(self, name):
+        with self._lock:
+            self._deque(self._outcomes, name).append(False)
+
+    def error_rate(self, name, default=None):
+        """Fracción de llamadas fallidas en la ventana, o `default` si hay pocas."""
+        with self._lock:
+            outcomes = list(self._outcomes.get(canonical_name(name), ()))
+        if len(outcomes) < self.min_samples:
+            return default
+        return outcomes.count(False) / len(outcomes)
+
+    def percentile(self, name, fraction, default=None):
+        """Percentil `fraction` (0.95 = p95) de las últimas llamadas, o `default` si hay pocas."""
+        with self._lock:
+            samples = sorted(self._samples.get(canonical_name(name), ()))
+        if len(samples) < self.min_samples:
+            return default
+        return samples[min(int(len(samples) * fraction), len(samples) - 1)]
+
+    def stats(self):
+        with self._lock:
+            names = list(self._outcomes)
+        return {
+            name: {
+                "p50": self.percentile(name, 0.5),
+                "p95": self.percentile(name, 0.95),
+                "errores": self.error_rate(name),
+            }
+            for name in names
+        }
+
+
+# Compartido por todo el proceso
+TRACKER = LatencyTracker()
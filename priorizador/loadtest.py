@@ -0,0 +1,84 @@
+"""Generador de carga para la API HTTP (conexiones keep-alive en hilos).
+
+    python -m priorizador.server --backend simulado --workers 16 &
+    python -m priorizador.loadtest --url http://127.0.0.1:8080 --connections 16 --seconds 20
+"""
+import argparse
+import http.client
+import json
+import threading
+import time
+from urllib.parse import urlparse
+
+SAMPLE = {
+    "rol": "Gerente de Ventas",
+    "tareas": "Revisar contrato del cliente X hoy\nComprar cartulina para el hijo\nLlamar al contador\nVer Netflix",
+}
+
+
+def _percentile(values, fraction):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+def run(url, connections=8, seconds=10.0, payload=SAMPLE):
+    target = urlparse(url)
+    body = json.dumps(payload).encode("utf-8")
+    headers = {"Content-Type": "application/json"}
+    deadline = time.monotonic() + seconds
+    latencies = []
+    statuses = {}
+    lock = threading.Lock()
+
+    def client():
+        conn = http.client.HTTPConnection(target.hostname, target.port or 80, timeout=30)
+        local, codes = [], {}
+        while time.monotonic() < deadline:
+            started = time.monotonic()
+            try:
+                conn.request("POST", "/v1/prioritize", body=body, headers=headers)
+                response = conn.getresponse()
+                response.read()
+                status = response.status
+                if response.getheader("Connection", "").lower() == "close":
+                    conn.close()
+            except (OSError, http.client.HTTPException):
+                status = "error"
+                conn.close()
+            local.append(time.monotonic() - started)
+            codes[status] = codes.get(status, 0) + 1
+        conn.close()
+        with lock:
+            latencies.extend(local)
+            for status, count in codes.items():
+                statuses[status] = statuses.get(status, 0) + count
+
+    threads = [threading.Thread(target=client) for _ in range(connections)]
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+    return {
+        "requests": len(latencies),
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(_percentile(latencies, 0.50) * 1000, 1),
+        "p99_ms": round(_percentile(latencies, 0.99) * 1000, 1),
+        "status": statuses,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m priorizador.loadtest", description="Carga sostenida contra la API.")
+    parser.add_argument("--url", default="http://127.0.0.1:8080")
+    parser.add_argument("--connections", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    args = parser.parse_args(argv)
+    print(json.dumps(run(args.url, args.connections, args.seconds)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""Memoria de clasificación por tarea: (rol, línea) -> cuadrante.
+
+Así, al agregar o editar unas pocas líneas, solo esas viajan al modelo.
+"""
+import os
+import sqlite3
+import threading
+import time
+
+from priorizador.cache import DEFAULT_CACHE_DIR, normalize_role
+from priorizador.engine import line_key
+
+
+class TaskMemo:
+    def __init__(self, path=None, ttl=30 * 24 * 3600):
+        self.path = path or os.path.join(DEFAULT_CACHE_DIR, "tasks.sqlite3")
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._memory = {}  # respaldo si no hay disco
+        self._db = None
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS tasks ("
+                " scope TEXT NOT NULL, line TEXT NOT NULL, quadrant TEXT NOT NULL, created REAL NOT NULL,"
+                " PRIMARY KEY (scope, line))"
+            )
+            self._db.commit()
+        except (OSError, sqlite3.Error):
+            self._db = None
+
+    @staticmethod
+    def _scope(role, model_name, prompt_version):
+        return f"{model_name}|{prompt_version}|{normalize_role(role)}"
+
+    def get_many(self, role, lines, model_name, prompt_version):
+        """Devuelve {línea: cuadrante} solo para las líneas ya clasificadas."""
+        scope = self._scope(role, model_name, prompt_version)
+        keys = {line_key(line): line for line in lines}
+        found = {}
+        with self._lock:
+            if self._db is None:
+                for key, line in keys.items():
+                    quadrant = self._memory.get((scope, key))
+                    if quadrant is not None:
+                        found[line] = quadrant
+                return found
+
+            min_created = time.time() - self.ttl if self.ttl is not None else 0
+            key_list = list(keys)
+            # SQLite limita la cantidad de parámetros por consulta
+            for start in range(0, len(key_list), 500):
+                batch = key_list[start:start + 500]
+                marks = ",".join("?" * len(batch))
+                try:
+                    rows = self._db.execute(
+                        f"SELECT line, quadrant FROM tasks WHERE scope = ? AND created >= ? AND line IN ({marks})",
+                        (scope, min_created, *batch),
+                    ).fetchall()
+                except sqlite3.Error:
+                    rows = []
+                for key, quadrant in rows:
+                    found[keys[key]] = quadrant
+        return found
+
+    def set_many(self, role, assigned, model_name, prompt_version):
+        """Guarda {línea: cuadrante}."""
+        if not assigned:
+            return
+        scope = self._scope(role, model_name, prompt_version)
+        now = time.time()
+        rows = [(scope, line_key(line), quadrant, now) for line, quadrant in assigned.items()]
+        with self._lock:
+            if self._db is None:
+                for scope_, key, quadrant, _ in rows:
+                    self._memory[(scope_, key)] = quadrant
+                return
+            try:
+                self._db.executemany("INSERT OR REPLACE INTO tasks VALUES (?, ?, ?, ?)", rows)
+                self._db.commit()
+            except sqlite3.Error:
+                pass
+
+    def role_items(self, role, model_name, prompt_version, limit=None):
+        """{línea: cuadrante} vigentes de un rol, de la más antigua a la más reciente (las `limit` últimas)."""
+        scope = self._scope(role, model_name, prompt_version)
+        with self._lock:
+            if self._db is None:
+                items = [(key, quadrant) for (scope_, key), quadrant in self._memory.items() if scope_ == scope]
+                return dict(items[-limit:] if limit else items)
+            min_created = time.time() - self.ttl if self.ttl is not None else 0
+            try:
+                rows = self._db.execute(
+                    "SELECT line, quadrant FROM tasks WHERE scope = ? AND created >= ? ORDER BY created DESC LIMIT ?",
+                    (scope, min_created, -1 if limit is None else limit),
+                ).fetchall()
+            except sqlite3.Error:
+                rows = []
+        return dict(reversed(rows))
+
+    def iter_all(self, model_name, prompt_version):
+        """Recorre (rol, línea, cuadrante) guardados para ese modelo y versión de prompt."""
+        if self._db is None:
+            items = [(scope, key, quadrant) for (scope, key), quadrant in self._memory.items()]
+        else:
+            with self._lock:
+                try:
+                    items = self._db.execute("SELECT scope, line, quadrant FROM tasks").fetchall()
+                except sqlite3.Error:
+                    items = []
+        prefix = f"{model_name}|{prompt_version}|"
+        for scope, key, quadrant in items:
+            if scope.startswith(prefix):
+                yield scope[len(prefix):], key, quadrant
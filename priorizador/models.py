@@ -0,0 +1,80 @@
+"""Registro de modelos: configura la API una sola vez y reutiliza los objetos."""
+import threading
+
+import google.generativeai as genai
+
+from priorizador.context import CONTEXT_MODE, context_model
+from priorizador.quota import ThrottledModel, get_limiter
+
+GEMINI_FLASH = "gemini-2.5-flash"
+GEMMA_1B = "models/gemma-3-1b-it"
+
+
+class ModelRegistry:
+    """Un GenerativeModel por nombre, compartido por todos los hilos del proceso."""
+
+    def __init__(self, api_key=None, warm=(GEMINI_FLASH, GEMMA_1B)):
+        self._lock = threading.Lock()
+        self._models = {}
+        self._api_key = None
+        self.hits = 0
+        self.creations = 0
+        if api_key:
+            self.configure(api_key)
+        for name in warm:
+            self.get(name)
+
+    def configure(self, api_key):
+        with self._lock:
+            if api_key == self._api_key:
+                return
+            genai.configure(api_key=api_key)
+            self._api_key = api_key
+            # Los modelos creados con otra clave ya no sirven
+            self._models.clear()
+
+    def _cached(self, name):
+        model = self._models.get(name)
+        # Una caché de contexto vencida se vuelve a crear (o a buscar) con otro modelo
+        if model is not None and not model.expired:
+            self.hits += 1
+            return model
+        return None
+
+    def get(self, name):
+        with self._lock:
+            model = self._cached(name)
+            if model is not None:
+                return model
+            # Sin clave no se intenta la caché del proveedor: las llamadas saldrían sin credenciales
+            mode = CONTEXT_MODE if self._api_key or CONTEXT_MODE != "proveedor" else "instruccion"
+        # Crear el modelo puede llamar a la API (caché de contexto): fuera del candado
+        built = ThrottledModel(context_model(genai, name, mode), get_limiter(name))
+        with self._lock:
+            # Otro hilo pudo crearlo mientras tanto: se queda el primero
+            model = self._cached(name)
+            if model is not None:
+                return model
+            # Las instrucciones fijas viajan con el modelo; todas sus llamadas comparten la cuota por minuto
+            self._models[name] = built
+            self.creations += 1
+            return built
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "creations": self.creations, "models": sorted(self._models)}
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry(api_key=None):
+    """Registro global del proceso (para scripts fuera de Streamlit)."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ModelRegistry(api_key)
+        elif api_key:
+            _registry.configure(api_key)
+        return _registry
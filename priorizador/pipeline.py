@@ -0,0 +1,203 @@
+"""Flujo completo de priorización, sin Streamlit.
+
+Orden de consulta para cada lista: caché de resultados -> memoria por tarea ->
+tareas casi iguales -> modelo local destilado -> Gemini (streaming, o por
+bloques concurrentes si la lista es grande). Si la misma lista ya está en
+camino al modelo, se espera ese resultado en vez de repetir la llamada. Lo
+usan la página y los procesos batch.
+"""
+import asyncio
+
+from priorizador.aio import analyze_tasks_async, run_with_events
+from priorizador.cache import ResultCache, make_key, split_tasks
+from priorizador.distill import load_if_available
+from priorizador.engine import (
+    CHUNK_MIN_SIZE,
+    PROMPT_VERSION,
+    assign_lines,
+    check_budget,
+    emit_result,
+    fits_one_call,
+    merge_result,
+)
+from priorizador.errors import BackendError
+from priorizador.memo import TaskMemo
+from priorizador.models import GEMINI_FLASH
+from priorizador.quota import reporting, within
+from priorizador.semantic import MAX_ITEMS_PER_ROLE, SemanticIndex
+from priorizador.singleflight import SingleFlight
+from priorizador.streaming import classify_stream
+
+# Plazo total (segundos) para analizar una lista grande
+ANALYZE_DEADLINE = 90
+# Plazo (segundos) de una llamada normal
+MODEL_TIMEOUT = 30
+
+
+def semantic_index(memo, model_name, prompt_version=PROMPT_VERSION):
+    """Índice de similitud que carga de la memoria por tarea cada rol la primera vez que se usa."""
+    return SemanticIndex(
+        loader=lambda role: memo.role_items(role, model_name, prompt_version, limit=MAX_ITEMS_PER_ROLE)
+    )
+
+
+def _shareable(error):
+    # Una cancelación o interrupción del primer pedido no es un error de quienes esperaban
+    if isinstance(error, Exception):
+        return error
+    return BackendError("El pedido original se interrumpió; vuelve a intentar")
+
+
+class Pipeline:
+    def __init__(self, models, model_name=GEMINI_FLASH, cache=None, memo=None, semantic=None, distilled=None,
+                 deadline=ANALYZE_DEADLINE, timeout=MODEL_TIMEOUT, hedge=None):
+        self.models = models
+        self.model_name = model_name
+        # Modelo alternativo que cubre al principal cuando se demora (ver aio.classify_hedged)
+        self.hedge = hedge
+        # Con cobertura el resultado puede venir de cualquiera de los dos: caché y memoria aparte
+        self.scope = model_name if hedge is None else f"{model_name}+{hedge}"
+        self.cache = cache if cache is not None else ResultCache()
+        self.memo = memo if memo is not None else TaskMemo()
+        self.semantic = semantic if semantic is not None else semantic_index(self.memo, self.scope)
+        # Modelo local entrenado con `python -m priorizador.distill`; si no existe, todo va a Gemini
+        self.distilled = distilled if distilled is not None else load_if_available()
+        self.deadline = deadline
+        self.timeout = timeout
+        self.flights = SingleFlight()
+
+    def run(self, tasks, role, on_event=None, deadline=None, timeout=None):
+        """Devuelve la matriz para `tasks`; las fallas del modelo se propagan.
+
+        on_event(tipo, cuadrante, texto) recibe cada tarea apenas se conoce, y
+        ("queued", None, posición) mientras se espera cuota del modelo.
+        `deadline` y `timeout` reemplazan los plazos por defecto para esta llamada.
+        """
+        key, lines, assigned, pending, cached = self._lookup(tasks, role)
+        if cached is not None:
+            return cached
+        if not pending:
+            result = self._store(key, role, lines, assigned, pending, None)
+            if on_event:
+                emit_result(result, on_event)
+            return result
+        # Presupuesto de tokens: se rechaza antes de gastar una llamada
+        check_budget(pending)
+        deadline = deadline or self.deadline
+        future, leader = self.flights.claim(key)
+        if not leader:
+            # Otra sesión ya pidió esta misma lista: se espera su resultado
+            result = future.result(deadline)
+            if on_event:
+                emit_result(result, on_event)
+            return result
+        # Quien era el primero pudo terminar entre la consulta a la caché y el claim
+        cached = self._recheck(key, future)
+        if cached is not None:
+            if on_event:
+                emit_result(cached, on_event)
+            return cached
+        if on_event:
+            for line, quadrant in assigned.items():
+                on_event("task", quadrant, line)
+        try:
+            # La espera por cuota también cuenta contra el plazo
+            with reporting(on_event), within(deadline):
+                partial = self._classify(pending, role, on_event, deadline, timeout or self.timeout)
+            result = self._store(key, role, lines, assigned, pending, partial)
+        except BaseException as e:
+            self.flights.resolve(key, future, error=_shareable(e))
+            raise
+        self.flights.resolve(key, future, result)
+        return result
+
+    async def run_async(self, tasks, role, deadline=None, timeout=None):
+        """Como `run`, pero la llamada al modelo va por el motor asíncrono."""
+        key, lines, assigned, pending, cached = self._lookup(tasks, role)
+        if cached is not None:
+            return cached
+        if not pending:
+            return self._store(key, role, lines, assigned, pending, None)
+        check_budget(pending)
+        deadline = deadline or self.deadline
+        future, leader = self.flights.claim(key)
+        if not leader:
+            # shield: si este pedido se cancela, el resultado compartido sigue en pie
+            return await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), deadline)
+        cached = self._recheck(key, future)
+        if cached is not None:
+            return cached
+        try:
+            partial = await analyze_tasks_async(
+                self.models.get(self.model_name),
+                pending,
+                role,
+                deadline=deadline,
+                call_timeout=timeout or self.timeout,
+                alternate=self._alternate(),
+            )
+            result = self._store(key, role, lines, assigned, pending, partial)
+        except BaseException as e:
+            self.flights.resolve(key, future, error=_shareable(e))
+            raise
+        self.flights.resolve(key, future, result)
+        return result
+
+    def _lookup(self, tasks, role):
+        """Todo lo que se resuelve sin llamar al modelo.
+
+        Devuelve (clave, líneas, {línea: cuadrante} conocidas, líneas pendientes, resultado en caché).
+        """
+        key = make_key(role, tasks, self.scope, PROMPT_VERSION)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return key, None, None, None, cached
+
+        # Solo las líneas nuevas o editadas van al modelo; el resto sale de la memoria
+        lines = split_tasks(tasks)
+        assigned = self.memo.get_many(role, lines, self.scope, PROMPT_VERSION)
+        pending = [line for line in lines if line not in assigned]
+        # Tareas casi iguales a otras ya clasificadas ("llamar contador mañana") reutilizan su cuadrante
+        if pending:
+            similar = self.semantic.lookup(role, pending)
+            assigned.update(similar)
+            pending = [line for line in pending if line not in similar]
+        # Las líneas que el modelo local clasifica con confianza alta se saltan la API
+        if self.distilled is not None and pending:
+            confident, pending = self.distilled.split_confident(role, pending)
+            assigned.update(confident)
+        return key, lines, assigned, pending, None
+
+    def _recheck(self, key, future):
+        """Tras ganar el claim: si el resultado ya está en caché, se publica sin llamar al modelo."""
+        cached = self.cache.get(key)
+        if cached is not None:
+            self.flights.resolve(key, future, cached)
+        return cached
+
+    def _store(self, key, role, lines, assigned, pending, partial):
+        if partial is not None:
+            fresh = assign_lines(pending, partial)
+            self.memo.set_many(role, fresh, self.scope, PROMPT_VERSION)
+            self.semantic.add(role, fresh)
+            assigned.update(fresh)
+        result = merge_result(lines, assigned, partial)
+        self.cache.set(key, result)
+        return result
+
+    def _alternate(self):
+        return None if self.hedge is None else self.models.get(self.hedge)
+
+    def _classify(self, pending, role, on_event, deadline, timeout):
+        model = self.models.get(self.model_name)
+        if on_event and len(pending) <= CHUNK_MIN_SIZE and self.hedge is None and fits_one_call(pending, role):
+            return classify_stream(model, pending, role, on_event, timeout=timeout, deadline=deadline)
+        # Listas grandes, largas en tokens o con cobertura: bloques concurrentes en el
+        # event loop compartido, cada bloque se informa al terminar
+        return run_with_events(
+            lambda emit: analyze_tasks_async(
+                model, pending, role, deadline=deadline, call_timeout=timeout, on_event=emit,
+                alternate=self._alternate(),
+            ),
+            on_event or (lambda *event: None),
+        )
@@ -0,0 +1,339 @@
+"""Cuota compartida de Gemini: token bucket de solicitudes y tokens por minuto.
+
+Todas las sesiones del proceso consumen de los mismos baldes (uno por modelo).
+Con PRIORIZADOR_QUOTA_DB los baldes viven en SQLite y los comparten todos los
+procesos de la máquina. Quien no alcanza cuota espera en una fila atendida por
+turnos entre sesiones: una sesión con una lista enorme no deja esperando a las
+demás, y las ráfagas se reparten en el tiempo en vez de terminar en errores 429.
+"""
+import asyncio
+import contextlib
+import contextvars
+import itertools
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import CancelledError
+
+from priorizador.tokens import estimate_tokens
+
+# Límites por modelo; se ajustan según el plan de la API
+DEFAULT_RPM = int(os.environ.get("PRIORIZADOR_RPM", 60))
+DEFAULT_TPM = int(os.environ.get("PRIORIZADOR_TPM", 1_000_000))
+# Tamaño del balde en segundos de cuota: una ráfaga no gasta el minuto entero de golpe
+BURST_SECONDS = 10
+# Tokens que se reservan para la respuesta de cada llamada
+RESPONSE_TOKENS = 300
+# Espera máxima en la fila (segundos) antes de rendirse con TimeoutError
+QUEUE_TIMEOUT = 120
+
+_session = contextvars.ContextVar("priorizador_session", default=None)
+_on_wait = contextvars.ContextVar("priorizador_on_wait", default=None)
+_until = contextvars.ContextVar("priorizador_until", default=None)
+
+
+@contextlib.contextmanager
+def session(name):
+    """Las llamadas al modelo dentro del bloque hacen fila como la sesión `name`."""
+    token = _session.set(name)
+    try:
+        yield
+    finally:
+        _session.reset(token)
+
+
+@contextlib.contextmanager
+def reporting(on_event):
+    """Mientras se espera turno se llama on_event("queued", None, posición); 0 al salir de la fila."""
+    token = _on_wait.set((lambda position: on_event("queued", None, position)) if on_event else None)
+    try:
+        yield
+    finally:
+        _on_wait.reset(token)
+
+
+@contextlib.contextmanager
+def within(seconds):
+    """Dentro del bloque, la espera en la fila y cada llamada terminan (TimeoutError) al cumplirse `seconds`.
+
+    Anidado, vale el plazo más corto: un bloque interior nunca extiende al de afuera.
+    """
+    until = None if seconds is None else time.monotonic() + seconds
+    outer = _until.get()
+    if outer is not None:
+        until = outer if until is None else min(until, outer)
+    token = _until.set(until)
+    try:
+        yield
+    finally:
+        _until.reset(token)
+
+
+def _queue_timeout():
+    until = _until.get()
+    return QUEUE_TIMEOUT if until is None else max(min(QUEUE_TIMEOUT, until - time.monotonic()), 0)
+
+
+def _clip(kwargs):
+    """Recorta el timeout de la llamada a lo que queda del plazo, medido ya con la cuota en mano."""
+    until = _until.get()
+    if until is None:
+        return kwargs
+    remaining = until - time.monotonic()
+    if remaining <= 0:
+        raise TimeoutError("Se superó el plazo del análisis")
+    options = dict(kwargs.get("request_options") or {})
+    options["timeout"] = min(options.get("timeout") or remaining, remaining)
+    return {**kwargs, "request_options": options}
+
+
+# --- BALDES ---
+def _refill(level, updated, now, capacity, rate):
+    return min(capacity, level + max(now - updated, 0) * rate)
+
+
+def _settle(state, costs, limits, now):
+    """Recarga los baldes y, si alcanzan todos, descuenta `costs`.
+
+    Devuelve (nuevos niveles, segundos a esperar); 0 significa que se tomó la cuota.
+    """
+    levels = {}
+    wait = 0.0
+    for name, (capacity, rate) in limits.items():
+        level, updated = state.get(name, (capacity, now))
+        levels[name] = _refill(level, updated, now, capacity, rate)
+        missing = costs[name] - levels[name]
+        if missing > 0:
+            wait = max(wait, missing / rate)
+    if wait == 0:
+        for name in limits:
+            levels[name] -= costs[name]
+    return levels, wait
+
+
+class MemoryBuckets:
+    """Baldes del proceso."""
+
+    def __init__(self):
+        self._state = {}  # balde -> (nivel, actualizado)
+        self._lock = threading.Lock()
+
+    def take(self, costs, limits):
+        with self._lock:
+            now = time.monotonic()
+            levels, wait = _settle(self._state, costs, limits, now)
+            for name, level in levels.items():
+                self._state[name] = (level, now)
+            return wait
+
+
+class SqliteBuckets:
+    """Baldes en un archivo SQLite compartido entre procesos (BEGIN IMMEDIATE como candado)."""
+
+    def __init__(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=10, isolation_level=None, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS buckets (name TEXT PRIMARY KEY, level REAL NOT NULL, updated REAL NOT NULL)"
+        )
+
+    def take(self, costs, limits):
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                marks = ", ".join("?" for _ in limits)
+                rows = self._db.execute(
+                    f"SELECT name, level, updated FROM buckets WHERE name IN ({marks})", list(limits)
+                ).fetchall()
+                levels, wait = _settle({name: (level, updated) for name, level, updated in rows}, costs, limits, now)
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO buckets (name, level, updated) VALUES (?, ?, ?)",
+                    [(name, level, now) for name, level in levels.items()],
+                )
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            return wait
+
+
+# --- FILA JUSTA ---
+class QuotaLimiter:
+    """Solicitudes y tokens por minuto para un modelo, con fila por turnos entre sesiones."""
+
+    def __init__(self, name, rpm=DEFAULT_RPM, tpm=DEFAULT_TPM, buckets=None):
+        self.name = name
+        self.limits = {}
+        for kind, per_minute in (("rpm", rpm), ("tpm", tpm)):
+            if per_minute:
+                rate = per_minute / 60
+                self.limits[f"{name}:{kind}"] = (max(rate * BURST_SECONDS, 1), rate)
+        self.buckets = buckets if buckets is not None else MemoryBuckets()
+        self._cond = threading.Condition()
+        # sesión -> turnos pendientes; la primera sesión es la que atiende ahora
+        self._queues = OrderedDict()
+        self._tickets = itertools.count()
+        self.waits = 0
+
+    def _costs(self, tokens):
+        costs = {}
+        for name, (capacity, _) in self.limits.items():
+            # Una llamada más grande que el balde entero pasa cuando el balde está lleno
+            costs[name] = min(1 if name.endswith(":rpm") else tokens, capacity)
+        return costs
+
+    @property
+    def queued(self):
+        with self._cond:
+            return sum(len(tickets) for tickets in self._queues.values())
+
+    def _position(self, session, ticket):
+        """Lugar en la fila (1 = siguiente) si se atiende un turno por sesión en ronda."""
+        depth = self._queues[session].index(ticket)
+        ahead = 0
+        before = True
+        for other, tickets in self._queues.items():
+            if other == session:
+                before = False
+            # Las rondas anteriores completas, más el turno de esta ronda de quienes van antes
+            ahead += min(len(tickets), depth) + (before and len(tickets) > depth)
+        return ahead + 1
+
+    def _served(self, session):
+        tickets = self._queues[session]
+        tickets.popleft()
+        if tickets:
+            # Turno cumplido: la sesión pasa al final de la ronda
+            self._queues.move_to_end(session)
+        else:
+            del self._queues[session]
+        self._cond.notify_all()
+
+    def _leave(self, session, ticket):
+        tickets = self._queues.get(session)
+        if tickets and ticket in tickets:
+            tickets.remove(ticket)
+            if not tickets:
+                del self._queues[session]
+            self._cond.notify_all()
+
+    def acquire(self, tokens=1, session=None, on_wait=None, timeout=QUEUE_TIMEOUT, cancelled=None):
+        """Bloquea hasta tener cuota para una llamada de `tokens` tokens.
+
+        `on_wait(posición)` se llama (fuera del candado) cada vez que cambia el
+        lugar en la fila, y con 0 al salir de ella. Si `cancelled` (threading.Event)
+        se activa, se sale de la fila sin tomar cuota con CancelledError.
+        Devuelve los segundos esperados.
+        """
+        if not self.limits:
+            return 0.0
+        costs = self._costs(tokens)
+        started = time.monotonic()
+        limit = None if timeout is None else started + timeout
+        reported = None
+        with self._cond:
+            if not self._queues and self.buckets.take(costs, self.limits) == 0:
+                return 0.0
+            ticket = next(self._tickets)
+            self._queues.setdefault(session, deque()).append(ticket)
+            self.waits += 1
+            try:
+                while True:
+                    if cancelled is not None and cancelled.is_set():
+                        raise CancelledError()
+                    position = self._position(session, ticket)
+                    wait = None
+                    if position == 1:
+                        wait = self.buckets.take(costs, self.limits)
+                        if wait == 0:
+                            self._served(session)
+                            break
+                    if on_wait and position != reported:
+                        reported = position
+                        self._cond.release()
+                        try:
+                            on_wait(position)
+                        finally:
+                            self._cond.acquire()
+                        continue
+                    if limit is not None:
+                        remaining = limit - time.monotonic()
+                        if remaining <= 0:
+                            raise TimeoutError("Sin cuota disponible del modelo; intenta en un momento")
+                        wait = remaining if wait is None else min(wait, remaining)
+                    self._cond.wait(wait)
+            except BaseException:
+                self._leave(session, ticket)
+                raise
+        if on_wait and reported is not None:
+            on_wait(0)
+        return time.monotonic() - started
+
+    def cancel(self, cancelled):
+        """Activa `cancelled` y despierta a la fila para que ese turno se retire ya."""
+        cancelled.set()
+        with self._cond:
+            self._cond.notify_all()
+
+    async def acquire_async(self, tokens=1, session=None, on_wait=None, timeout=QUEUE_TIMEOUT):
+        # La espera bloquea un hilo del executor, no el event loop
+        cancelled = threading.Event()
+        try:
+            return await asyncio.to_thread(self.acquire, tokens, session, on_wait, timeout, cancelled)
+        except asyncio.CancelledError:
+            # wait_for vencido o cobertura perdida: el hilo deja su turno en vez de gastar cuota
+            self.cancel(cancelled)
+            raise
+
+
+class ThrottledModel:
+    """Envuelve un GenerativeModel: cada llamada pide cuota antes de salir."""
+
+    def __init__(self, model, limiter):
+        self._model = model
+        self.limiter = limiter
+
+    def __getattr__(self, name):
+        return getattr(self._model, name)
+
+    def _cost(self, contents):
+        return estimate_tokens(contents) + RESPONSE_TOKENS
+
+    def generate_content(self, contents, **kwargs):
+        self.limiter.acquire(self._cost(contents), _session.get(), _on_wait.get(), _queue_timeout())
+        return self._model.generate_content(contents, **_clip(kwargs))
+
+    async def generate_content_async(self, contents, **kwargs):
+        await self.limiter.acquire_async(self._cost(contents), _session.get(), _on_wait.get(), _queue_timeout())
+        return await self._model.generate_content_async(contents, **_clip(kwargs))
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+_shared_buckets = None
+
+
+def _buckets():
+    global _shared_buckets
+    path = os.environ.get("PRIORIZADOR_QUOTA_DB")
+    if not path:
+        return MemoryBuckets()
+    if _shared_buckets is None:
+        _shared_buckets = SqliteBuckets(path)
+    return _shared_buckets
+
+
+def get_limiter(model_name):
+    """Limitador del proceso para `model_name` (compartido por todas las sesiones)."""
+    with _limiters_lock:
+        limiter = _limiters.get(model_name)
+        if limiter is None:
+            limiter = _limiters[model_name] = QuotaLimiter(model_name, buckets=_buckets())
+        return limiter
@@ -0,0 +1,119 @@
+"""Reintentos de las llamadas al modelo: backoff exponencial con jitter completo.
+
+Solo se reintenta lo pasajero (429, 5xx, plazos vencidos, conexión caída, JSON
+cortado). Lo que no va a cambiar (clave inválida, pedido rechazado) falla de
+inmediato. Si el servidor indica cuánto esperar (Retry-After o "retry in Ns"),
+se respeta; y nunca se pasa del plazo total de la política.
+"""
+import asyncio
+import random
+import re
+import time
+
+from priorizador.errors import ResponseFormatError
+
+# Códigos HTTP que indican un problema pasajero
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+MAX_ATTEMPTS = 4
+# Espera base y tope (segundos) del backoff exponencial
+BASE_DELAY = 0.5
+MAX_DELAY = 8
+# Plazo total (segundos) para todos los intentos de una llamada
+RETRY_DEADLINE = 60
+
+_RETRY_IN = re.compile(r"retry in ([\d.]+)\s*s", re.IGNORECASE)
+
+
+def status_code(error):
+    """Código HTTP de una excepción de google.api_core (o de cualquier otra con `.code` numérico)."""
+    code = getattr(error, "code", None)
+    if callable(code):
+        # Excepciones gRPC: code() devuelve un StatusCode, no un número
+        return None
+    return code if isinstance(code, int) else None
+
+
+def retry_after(error):
+    """Segundos que el servidor pidió esperar, si los indicó."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    value = headers.get("Retry-After") if hasattr(headers, "get") else None
+    if value:
+        try:
+            return max(float(value), 0.0)
+        except ValueError:
+            pass
+    for detail in getattr(error, "details", None) or []:
+        delay = getattr(detail, "retry_delay", None)
+        if delay is not None:
+            if hasattr(delay, "total_seconds"):
+                return delay.total_seconds()
+            return getattr(delay, "seconds", 0) + getattr(delay, "nanos", 0) / 1e9
+    match = _RETRY_IN.search(str(error))
+    return float(match.group(1)) if match else None
+
+
+def is_retryable(error):
+    if isinstance(error, ResponseFormatError):
+        # Respuesta cortada o mal formada: otro intento suele salir bien
+        return True
+    if isinstance(error, (TimeoutError, asyncio.TimeoutError, ConnectionError)):
+        return True
+    code = status_code(error)
+    return code in RETRYABLE_STATUS
+
+
+class RetryPolicy:
+    def __init__(self, attempts=MAX_ATTEMPTS, base=BASE_DELAY, cap=MAX_DELAY, deadline=RETRY_DEADLINE):
+        self.attempts = attempts
+        self.base = base
+        self.cap = cap
+        self.deadline = deadline
+
+    def within(self, seconds):
+        """La misma política, con el plazo total recortado a `seconds` (None = sin cambio)."""
+        if seconds is None:
+            return self
+        deadline = seconds if self.deadline is None else min(self.deadline, seconds)
+        return RetryPolicy(self.attempts, self.base, self.cap, deadline)
+
+    def delay(self, attempt, error):
+        """Espera antes del intento `attempt + 1`: jitter completo, o lo que pidió el servidor."""
+        backoff = random.uniform(0, min(self.cap, self.base * 2 ** attempt))
+        hint = retry_after(error)
+        return backoff if hint is None else max(hint, backoff)
+
+    def _next_delay(self, attempt, error, started):
+        # None = no reintentar: error fatal, sin intentos o sin tiempo
+        if attempt + 1 >= self.attempts or not is_retryable(error):
+            return None
+        delay = self.delay(attempt, error)
+        if self.deadline is not None and time.monotonic() + delay - started > self.deadline:
+            return None
+        return delay
+
+    def call(self, fn, *args, **kwargs):
+        started = time.monotonic()
+        for attempt in range(self.attempts):
+            try:
+                return fn(*args, **kwargs)
+            except Exception as e:
+                delay = self._next_delay(attempt, e, started)
+                if delay is None:
+                    raise
+            time.sleep(delay)
+
+    async def acall(self, fn, *args, **kwargs):
+        """Como `call`, para una función async (se vuelve a invocar en cada intento)."""
+        started = time.monotonic()
+        for attempt in range(self.attempts):
+            try:
+                return await fn(*args, **kwargs)
+            except Exception as e:
+                delay = self._next_delay(attempt, e, started)
+                if delay is None:
+                    raise
+            await asyncio.sleep(delay)
+
+
+DEFAULT_POLICY = RetryPolicy()
@@ -0,0 +1,110 @@
+"""Elige, pedido por pedido, entre Gemini Flash y Gemma 1B.
+
+Las listas chicas y claras van a Gemma (más barato y rápido); las grandes o
+ambiguas, a Flash. La salud reciente de cada modelo (p95 y tasa de errores) y
+el presupuesto de latencia de quien llama pueden cambiar esa preferencia. Cada
+decisión queda registrada con su motivo.
+"""
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+
+from priorizador.cache import split_tasks
+from priorizador.engine import build_prompt
+from priorizador.latency import TRACKER
+from priorizador.models import GEMINI_FLASH, GEMMA_1B
+from priorizador.rules import classify_line
+from priorizador.tokens import estimate_tokens
+
+# Hasta aquí una lista se considera chica
+SMALL_LIST = 8
+SMALL_PROMPT_TOKENS = 700
+# Las reglas locales no ven señales en la tarea: hace falta un modelo con más criterio
+AMBIGUOUS_CONFIDENCE = 0.5
+AMBIGUOUS_SHARE = 0.5
+# Con más errores que esto, un modelo se evita mientras el otro esté sano
+MAX_ERROR_RATE = 0.25
+# Decisiones recientes que se guardan para auditoría
+HISTORY = 500
+
+MODELS = {"flash": GEMINI_FLASH, "gemma": GEMMA_1B}
+
+
+@dataclass
+class Route:
+    backend: str
+    reason: str
+    lines: int = 0
+    tokens: int = 0
+
+
+def _healthy(name, tracker):
+    rate = tracker.error_rate(MODELS[name])
+    return rate is None or rate <= MAX_ERROR_RATE
+
+
+def _fits(name, budget, tracker):
+    p95 = tracker.percentile(MODELS[name], 0.95)
+    return budget is None or p95 is None or p95 <= budget
+
+
+def choose(tasks, role, budget=None, tracker=TRACKER):
+    """Devuelve la Route para este pedido; `budget` es la latencia máxima deseada (segundos)."""
+    lines = split_tasks(tasks)
+    tokens = estimate_tokens(build_prompt(lines, role))
+
+    def route(backend, reason):
+        return Route(backend, reason, len(lines), tokens)
+
+    # 1. Salud: un modelo que está fallando se evita si el otro responde bien
+    for bad, good in (("flash", "gemma"), ("gemma", "flash")):
+        if not _healthy(bad, tracker) and _healthy(good, tracker):
+            return route(good, f"{bad} con {tracker.error_rate(MODELS[bad]):.0%} de errores recientes")
+
+    # 2. Presupuesto: si solo uno lo cumple según su p95, va ese
+    if budget is not None:
+        flash_fits, gemma_fits = _fits("flash", budget, tracker), _fits("gemma", budget, tracker)
+        if flash_fits != gemma_fits:
+            backend = "flash" if flash_fits else "gemma"
+            other = "gemma" if flash_fits else "flash"
+            p95 = tracker.percentile(MODELS[other], 0.95)
+            return route(backend, f"p95 de {other} ({p95:.1f}s) excede el presupuesto de {budget:g}s")
+
+    # 3. Carga de trabajo
+    if len(lines) > SMALL_LIST or tokens > SMALL_PROMPT_TOKENS:
+        return route("flash", f"lista grande ({len(lines)} tareas, ~{tokens} tokens)")
+    unclear = sum(classify_line(line, role)[1] < AMBIGUOUS_CONFIDENCE for line in lines)
+    if lines and unclear / len(lines) > AMBIGUOUS_SHARE:
+        return route("flash", f"lista ambigua ({unclear} de {len(lines)} tareas sin señales claras)")
+    return route("gemma", f"lista chica y clara ({len(lines)} tareas, ~{tokens} tokens)")
+
+
+class RouteLog:
+    """Últimas decisiones del router, para revisar por qué se eligió cada modelo."""
+
+    def __init__(self, size=HISTORY):
+        self._entries = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def record(self, route, budget=None):
+        with self._lock:
+            self._entries.append({
+                "hora": time.time(),
+                "backend": route.backend,
+                "motivo": route.reason,
+                "tareas": route.lines,
+                "tokens": route.tokens,
+                "presupuesto": budget,
+            })
+
+    def recent(self, limit=50):
+        with self._lock:
+            return list(self._entries)[-limit:]
+
+    def counts(self):
+        with self._lock:
+            counts = {}
+            for entry in self._entries:
+                counts[entry["backend"]] = counts.get(entry["backend"], 0) + 1
+            return counts
@@ -0,0 +1,146 @@
+"""Clasificador local por reglas: sin red, determinista y en microsegundos.
+
+Sirve como modo "rápido" y como respaldo cuando el modelo falla o se demora.
+Busca señales en cada línea (plazos, verbos, temas, pistas de delegación) y
+las pondera según el rol.
+"""
+import re
+import unicodedata
+
+from priorizador.cache import split_tasks
+from priorizador.engine import QUADRANTS
+
+# Señales de urgencia: plazos y fechas cercanas
+URGENT_TERMS = {
+    "hoy": 3, "urgente": 3, "ya": 2, "ahora": 2, "inmediato": 3, "asap": 3,
+    "manana": 2, "esta tarde": 2, "esta noche": 2, "esta semana": 1,
+    "vence": 3, "vencimiento": 3, "plazo": 2, "fecha limite": 3, "antes de": 1,
+    "atrasado": 2, "atrasada": 2, "pendiente": 1, "recordar": 1, "hasta el": 1,
+    "lunes": 1, "martes": 1, "miercoles": 1, "jueves": 1, "viernes": 1,
+}
+# Señales de importancia: temas con consecuencias
+IMPORTANT_TERMS = {
+    "cliente": 2, "contrato": 2, "pago": 2, "pagar": 2, "factura": 2, "facturas": 2,
+    "impuesto": 2, "impuestos": 2, "banco": 1, "informe": 2, "reporte": 2,
+    "presentacion": 2, "propuesta": 2, "proyecto": 2, "estrategia": 2, "plan": 1,
+    "reunion": 1, "jefe": 1, "directorio": 2, "medico": 2, "salud": 2, "doctor": 2,
+    "examen": 2, "hijo": 1, "hija": 1, "familia": 1, "entregar": 2, "preparar": 1,
+    "revisar": 1, "firmar": 2, "contador": 1, "presupuesto": 2, "aprender": 1,
+    "curso": 1, "ejercicio": 1, "planificar": 1, "disenar": 1, "escribir": 1,
+}
+# Señales de delegación: trámites o pedidos a otros
+DELEGATE_TERMS = {
+    "pedir a": 3, "pedirle a": 3, "encargar": 3, "delegar": 3, "solicitar": 2,
+    "que haga": 2, "coordinar con": 2, "avisar a": 2, "comprar": 2, "reservar": 2,
+    "agendar": 1, "cotizar": 1, "enviar": 1, "mandar": 1, "imprimir": 2,
+    "llamar a": 1, "retirar": 1, "tramite": 2, "sacar fotocopias": 3,
+}
+# Señales de eliminación: distracciones y "algún día"
+ELIMINATE_TERMS = {
+    "redes sociales": 3, "facebook": 3, "instagram": 3, "tiktok": 3, "youtube": 2,
+    "netflix": 3, "serie": 2, "series": 2, "chisme": 3, "chismes": 3, "videojuego": 3,
+    "navegar": 2, "scroll": 3, "algun dia": 3, "tal vez": 2, "quizas": 2,
+    "ordenar escritorio": 1, "revisar correo": 1, "mirar": 1,
+}
+
+# Temas que pesan más según el rol (la clave se busca dentro del rol)
+ROLE_TERMS = {
+    "venta": {"cliente": 2, "propuesta": 2, "cotizacion": 2, "meta": 2, "prospecto": 2},
+    "abogad": {"contrato": 2, "audiencia": 3, "escrito": 2, "demanda": 3, "juicio": 3, "plazo": 2},
+    "gerente": {"equipo": 2, "presupuesto": 2, "directorio": 2, "estrategia": 2},
+    "coach": {"sesion": 2, "cliente": 2, "post": 1, "linkedin": 1, "taller": 2},
+    "casa": {"colegio": 2, "cuentas": 2, "supermercado": 1, "medico": 2, "hijo": 2},
+    "medic": {"paciente": 3, "turno": 2, "receta": 2, "examen": 2},
+    "profesor": {"clase": 2, "prueba": 2, "notas": 2, "alumno": 2},
+    "desarroll": {"bug": 2, "deploy": 3, "produccion": 3, "review": 1},
+}
+# Roles con equipo a cargo delegan con más facilidad
+DELEGATOR_ROLES = ("gerente", "jefe", "director", "dueno", "lider", "coordinador")
+
+DATE_PATTERN = re.compile(r"\b\d{1,2}[/-]\d{1,2}(?:[/-]\d{2,4})?\b")
+
+
+def fold(text):
+    """Minúsculas y sin tildes, para comparar con el léxico."""
+    text = unicodedata.normalize("NFKD", str(text).casefold())
+    return "".join(char for char in text if not unicodedata.combining(char))
+
+
+def _compile(terms):
+    # Una sola alternancia por categoría: un barrido del texto en vez de uno por término
+    if not terms:
+        return None, {}
+    alternatives = "|".join(re.escape(term) for term in sorted(terms, key=len, reverse=True))
+    return re.compile(rf"\b(?:{alternatives})\b"), terms
+
+
+_URGENT = _compile(URGENT_TERMS)
+_IMPORTANT = _compile(IMPORTANT_TERMS)
+_DELEGATE = _compile(DELEGATE_TERMS)
+_ELIMINATE = _compile(ELIMINATE_TERMS)
+_ROLE_CACHE = {}
+
+
+def _role_profile(role):
+    key = fold(role)
+    profile = _ROLE_CACHE.get(key)
+    if profile is None:
+        terms = {}
+        for fragment, extra in ROLE_TERMS.items():
+            if fragment in key:
+                terms.update(extra)
+        delegator = any(fragment in key for fragment in DELEGATOR_ROLES)
+        profile = _ROLE_CACHE[key] = (_compile(terms), delegator)
+    return profile
+
+
+def _score(compiled, text):
+    pattern, weights = compiled
+    if pattern is None:
+        return 0
+    return sum(weights[term] for term in set(pattern.findall(text)))
+
+
+def classify_line(line, role=""):
+    """Devuelve (cuadrante, confianza entre 0 y 1) para una tarea."""
+    text = fold(line)
+    role_terms, delegator = _role_profile(role)
+    urgent = _score(_URGENT, text) + (2 if DATE_PATTERN.search(text) else 0)
+    important = _score(_IMPORTANT, text) + _score(role_terms, text)
+    delegate = _score(_DELEGATE, text) + (1 if delegator else 0)
+    eliminate = _score(_ELIMINATE, text)
+
+    if eliminate >= 2 and eliminate > important and urgent < 2:
+        quadrant, margin = "eliminar", eliminate - important
+    elif delegate >= 3 and delegate > important:
+        quadrant, margin = "delegar", delegate - important
+    elif urgent >= 2 and important >= 1:
+        quadrant, margin = "hacer", min(urgent, important)
+    elif delegate >= 2 and important < 2:
+        quadrant, margin = "delegar", delegate - important
+    elif important >= 1:
+        quadrant, margin = "planificar", important - (urgent >= 2)
+    elif urgent >= 2:
+        # Urgente sin señales de importancia: lo clásico es delegarlo
+        quadrant, margin = "delegar", urgent - 1
+    else:
+        # Sin señales: planificar es la opción más segura
+        return "planificar", 0.3
+    confidence = min(0.5 + 0.1 * max(margin, 0), 0.95)
+    return quadrant, round(confidence, 2)
+
+
+def classify_rules(tasks, role=""):
+    """Misma forma que la respuesta del modelo, sin salir de la máquina."""
+    result = {quadrant: [] for quadrant in QUADRANTS}
+    for line in split_tasks(tasks):
+        quadrant, _ = classify_line(line, role)
+        result[quadrant].append(line)
+    if result["hacer"]:
+        tip = f"Empieza por lo urgente: {result['hacer'][0]}"
+    elif result["planificar"]:
+        tip = f"Bloquea tiempo hoy para: {result['planificar'][0]}"
+    else:
+        tip = "Nada crítico hoy: delega lo que puedas y descarta el resto."
+    result["recomendacion_top"] = tip
+    return result
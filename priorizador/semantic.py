@@ -0,0 +1,204 @@
+"""Índice de similitud para reutilizar clasificaciones de tareas casi iguales.
+
+"Llamar al contador" y "llamar contador mañana" no coinciden exactamente,
+pero son la misma tarea. Cada línea se representa con un embedding local de
+n-gramas de caracteres (hashing) y se busca la más parecida por coseno en una
+matriz NumPy, separada por rol.
+"""
+import threading
+import zlib
+from collections import OrderedDict
+
+import numpy as np
+
+from priorizador.cache import normalize_role
+from priorizador.rules import fold
+
+# 512 dimensiones (2 KB por línea) separan igual de bien que 4096 las tareas cortas
+N_DIMS = 2 ** 9
+NGRAM_SIZES = (3, 4)
+# Tope de líneas por rol y en total (~2 KB cada una); filas que se reservan de una vez
+MAX_ITEMS_PER_ROLE = 5000
+MAX_ITEMS = 20000
+BLOCK_ROWS = 256
+# Similitud coseno mínima para reutilizar el cuadrante guardado
+SIMILARITY_THRESHOLD = 0.8
+# Palabras que no aportan al significado de la tarea
+STOPWORDS = frozenset(
+    "a al el la los las de del y en para por con un una unos unas que mi mis su sus lo".split()
+)
+
+
+def embed(lines):
+    """Matriz (n x N_DIMS) de n-gramas de caracteres hasheados, normalizada por fila."""
+    matrix = np.zeros((len(lines), N_DIMS), dtype=np.float32)
+    for row, line in enumerate(lines):
+        for word in _key(line).split():
+            if word in STOPWORDS:
+                continue
+            # n-gramas dentro de cada palabra: "contador" se parece a "contadora", no a "al contador"
+            text = f" {word} "
+            for size in NGRAM_SIZES:
+                for start in range(max(len(text) - size + 1, 1)):
+                    index = zlib.crc32(text[start:start + size].encode("utf-8"))
+                    # El bit alto decide el signo: reduce el sesgo de las colisiones
+                    matrix[row, index % N_DIMS] += 1.0 if index & 0x80000000 else -1.0
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    np.divide(matrix, norms, out=matrix, where=norms > 0)
+    return matrix
+
+
+def _key(line):
+    return " ".join(fold(line).split())
+
+
+class _RoleIndex:
+    """Vectores de un rol en bloques preasignados; lleno, sobrescribe el más antiguo (anillo)."""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.vectors = np.zeros((min(BLOCK_ROWS, limit), N_DIMS), dtype=np.float32)
+        self.lines = []  # fila -> línea
+        self.quadrants = []
+        self.positions = {}  # línea -> fila
+        self.next = 0  # próxima fila a sobrescribir cuando el anillo está lleno
+
+    def __len__(self):
+        return len(self.lines)
+
+    def _slot(self):
+        size = len(self.lines)
+        if size < self.limit:
+            if size == len(self.vectors):
+                # Crecer por duplicación: copia amortizada, no una por cada línea nueva
+                grown = np.zeros((min(size * 2, self.limit), N_DIMS), dtype=np.float32)
+                grown[:size] = self.vectors
+                self.vectors = grown
+            self.lines.append(None)
+            self.quadrants.append(None)
+            return size
+        slot = self.next
+        self.next = (slot + 1) % self.limit
+        del self.positions[self.lines[slot]]
+        return slot
+
+    def put(self, keys, vectors, quadrants):
+        for key, vector, quadrant in zip(keys, vectors, quadrants):
+            slot = self._slot()
+            self.vectors[slot] = vector
+            self.lines[slot] = key
+            self.quadrants[slot] = quadrant
+            self.positions[key] = slot
+
+
+class SemanticIndex:
+    """Guarda (rol, línea) -> cuadrante y responde por vecino más cercano.
+
+    `loader(rol)` devuelve {línea: cuadrante} ya conocidas para un rol; se llama
+    la primera vez que se consulta ese rol. Con más de `max_items` líneas en total
+    se descarta el rol usado hace más tiempo.
+    """
+
+    def __init__(self, threshold=SIMILARITY_THRESHOLD, max_items_per_role=MAX_ITEMS_PER_ROLE,
+                 max_items=MAX_ITEMS, loader=None):
+        self.threshold = threshold
+        self.max_items_per_role = max_items_per_role
+        self.max_items = max_items
+        self.loader = loader
+        self._roles = OrderedDict()  # rol -> _RoleIndex, el menos usado primero
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            return sum(len(index) for index in self._roles.values())
+
+    def _role(self, role):
+        # Con el candado tomado: marca el rol como recién usado
+        index = self._roles.get(role)
+        if index is not None:
+            self._roles.move_to_end(role)
+        return index
+
+    def _ensure(self, role):
+        with self._lock:
+            if self._role(role) is not None:
+                return
+        # La carga (SQLite) y los embeddings van fuera del candado
+        known = self.loader(role) if self.loader else {}
+        keyed = {_key(line): quadrant for line, quadrant in known.items()}
+        keys = list(keyed)[-self.max_items_per_role:]
+        vectors = embed(keys)
+        with self._lock:
+            if self._role(role) is not None:
+                return
+            index = self._roles[role] = _RoleIndex(self.max_items_per_role)
+            index.put(keys, vectors, [keyed[key] for key in keys])
+            self._evict()
+
+    def _evict(self):
+        total = sum(len(index) for index in self._roles.values())
+        while total > self.max_items and len(self._roles) > 1:
+            _, index = self._roles.popitem(last=False)
+            total -= len(index)
+
+    def add(self, role, assigned):
+        """Agrega {línea: cuadrante}; si la línea ya existe se actualiza su cuadrante."""
+        keyed = {_key(line): quadrant for line, quadrant in assigned.items()}
+        if not keyed:
+            return
+        role = normalize_role(role)
+        self._ensure(role)
+        with self._lock:
+            index = self._role(role)
+            new_lines = [key for key in keyed if index is None or key not in index.positions]
+        # Los embeddings se calculan fuera del candado
+        vectors = dict(zip(new_lines, embed(new_lines)))
+        with self._lock:
+            # El rol pudo salir del índice (o recibir estas líneas) entre los dos candados
+            index = self._role(role)
+            if index is None:
+                index = self._roles[role] = _RoleIndex(self.max_items_per_role)
+            fresh = []
+            for key, quadrant in keyed.items():
+                row = index.positions.get(key)
+                if row is not None:
+                    index.quadrants[row] = quadrant
+                else:
+                    fresh.append(key)
+            if fresh:
+                missing = [key for key in fresh if key not in vectors]
+                if missing:
+                    vectors.update(zip(missing, embed(missing)))
+                index.put(fresh, [vectors[key] for key in fresh], [keyed[key] for key in fresh])
+                self._evict()
+
+    def search(self, role, lines, k=1):
+        """Top-k por línea: lista de [(línea_guardada, cuadrante, similitud)]."""
+        if not lines:
+            return []
+        role = normalize_role(role)
+        self._ensure(role)
+        queries = embed(lines)
+        with self._lock:
+            index = self._role(role)
+            if index is None or not len(index):
+                return [[] for _ in lines]
+            # Las filas se sobrescriben en su lugar: el producto se calcula con el candado tomado
+            scores = queries @ index.vectors[:len(index)].T
+            stored, quadrants = list(index.lines), list(index.quadrants)
+        k = min(k, len(stored))
+        # argpartition evita ordenar toda la fila cuando el índice es grande
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        results = []
+        for row, candidates in enumerate(top):
+            ordered = sorted(candidates, key=lambda col: -scores[row, col])
+            results.append([(stored[col], quadrants[col], float(scores[row, col])) for col in ordered])
+        return results
+
+    def lookup(self, role, lines):
+        """{línea: cuadrante} para las líneas con un vecino sobre el umbral."""
+        found = {}
+        for line, matches in zip(lines, self.search(role, lines)):
+            if matches and matches[0][2] >= self.threshold:
+                found[line] = matches[0][1]
+        return found
@@ -0,0 +1,254 @@
+"""API HTTP local de priorización (JSON de entrada, JSON de salida).
+
+    python -m priorizador.server --port 8080 --workers 8 --queue 64 --backend flash
+
+Endpoints:
+    GET  /healthz                 el proceso responde
+    GET  /readyz                  el backend está listo y la cola tiene espacio
+    POST /v1/prioritize           {"rol": "...", "tareas": "..." | [...], "backend": "...", "presupuesto": 5}
+    POST /v1/prioritize/batch     {"items": [{"id": "...", "rol": "...", "tareas": ...}], "backend": "..."}
+
+Las conexiones se atienden con un pool fijo de workers y una cola acotada: si
+la cola está llena se responde 503 de inmediato en vez de acumular latencia.
+Las conexiones son keep-alive (HTTP/1.1) con un tiempo de inactividad corto.
+Para pruebas de carga sin cuota, usar `--backend simulado`.
+"""
+import argparse
+import json
+import queue
+import socket
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+from priorizador.api import Options, prioritize
+from priorizador.backends import BACKENDS, get_backend
+from priorizador.errors import BackendError, ConfigurationError, DeadlineExceeded, TokenBudgetExceeded
+
+MAX_BODY_BYTES = 1024 * 1024
+MAX_BATCH_ITEMS = 100
+# Segundos que una conexión keep-alive inactiva puede retener a un worker
+KEEPALIVE_TIMEOUT = 5
+
+
+def error_status(error):
+    """Código HTTP para un error del análisis.
+
+    El orden importa: ResponseFormatError también es ValueError y DeadlineExceeded
+    también es BackendError, pero son fallas del modelo, no del cliente.
+    """
+    if isinstance(error, DeadlineExceeded):
+        return 504
+    if isinstance(error, BackendError):
+        return 502
+    if isinstance(error, ConfigurationError):
+        return 500
+    if isinstance(error, TokenBudgetExceeded):
+        return 413
+    return 400
+
+
+class PoolHTTPServer(HTTPServer):
+    """HTTPServer con N workers fijos y una cola de conexiones de tamaño máximo."""
+
+    def __init__(self, address, handler, workers=8, max_queue=64, backend="flash", api_key=None):
+        super().__init__(address, handler)
+        self.backend = backend
+        self.api_key = api_key
+        self.workers = workers
+        self.ready = False
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._threads = [
+            threading.Thread(target=self._work, name=f"priorizador-http-{n}", daemon=True) for n in range(workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def warm_up(self):
+        # Crear el backend (modelos, cachés, índices) antes de declararse listo
+        get_backend(self.backend, self.api_key)
+        self.ready = True
+
+    @property
+    def queue_depth(self):
+        return self._queue.qsize()
+
+    def process_request(self, request, client_address):
+        try:
+            self._queue.put_nowait((request, client_address))
+        except queue.Full:
+            self._reject(request)
+
+    def _reject(self, request):
+        body = json.dumps({"error": "Servidor saturado, reintenta en unos segundos"}).encode("utf-8")
+        try:
+            request.sendall(
+                b"HTTP/1.1 503 Service Unavailable\r\nContent-Type: application/json\r\nRetry-After: 1\r\n"
+                + f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode("ascii")
+                + body
+            )
+        except OSError:
+            pass
+        self.shutdown_request(request)
+
+    def _work(self):
+        while True:
+            request, client_address = self._queue.get()
+            try:
+                self.finish_request(request, client_address)
+            except Exception:
+                self.handle_error(request, client_address)
+            finally:
+                self.shutdown_request(request)
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    timeout = KEEPALIVE_TIMEOUT
+    server_version = "Priorizador/1.0"
+
+    def log_message(self, format, *args):
+        # Sin log por request: bajo carga el stderr se vuelve el cuello de botella
+        pass
+
+    def _send(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_BODY_BYTES:
+            self.close_connection = True
+            self._send(413, {"error": "Cuerpo demasiado grande"})
+            return None
+        try:
+            data = json.loads(self.rfile.read(length) or b"null")
+        except ValueError:
+            self._send(400, {"error": "JSON inválido"})
+            return None
+        if not isinstance(data, dict):
+            self._send(400, {"error": "Se esperaba un objeto JSON"})
+            return None
+        return data
+
+    def do_GET(self):
+        if self.path == "/healthz":
+            self._send(200, {"status": "ok"})
+        elif self.path == "/readyz":
+            ready = self.server.ready and not self.server._queue.full()
+            self._send(200 if ready else 503, {
+                "ready": ready,
+                "backend": self.server.backend,
+                "workers": self.server.workers,
+                "queue": self.server.queue_depth,
+            })
+        else:
+            self._send(404, {"error": "No encontrado"})
+
+    def do_POST(self):
+        if self.path not in ("/v1/prioritize", "/v1/prioritize/batch"):
+            self._send(404, {"error": "No encontrado"})
+            return
+        data = self._read_json()
+        if data is None:
+            return
+        backend = data.get("backend") or self.server.backend
+        if backend not in BACKENDS:
+            self._send(400, {"error": f"Backend desconocido: {backend}"})
+            return
+        if self.path == "/v1/prioritize":
+            self._one(data, backend)
+        else:
+            self._batch(data, backend)
+
+    def _classify(self, item, backend):
+        tasks = item.get("tareas", item.get("tasks"))
+        role = item.get("rol") or item.get("role") or "Profesional ocupado"
+        if not tasks:
+            raise ValueError("Faltan las tareas")
+        if not isinstance(tasks, str) and not (
+            isinstance(tasks, list) and all(isinstance(task, str) for task in tasks)
+        ):
+            raise ValueError("'tareas' debe ser un texto (una tarea por línea) o una lista de textos")
+        if not isinstance(role, str):
+            raise ValueError("'rol' debe ser un texto")
+        # Cada cliente hace fila como una sesión distinta para la cuota del modelo
+        budget = item.get("presupuesto")
+        if budget is not None and (not isinstance(budget, (int, float)) or budget <= 0):
+            raise ValueError("'presupuesto' debe ser un número de segundos mayor que cero")
+        options = Options(api_key=self.server.api_key, session=self.client_address[0], budget=budget)
+        matrix = prioritize(tasks, role, backend=backend, options=options)
+        result = {**matrix.to_dict(), "backend": matrix.backend}
+        if matrix.route:
+            result["motivo"] = matrix.route
+        return result
+
+    def _one(self, data, backend):
+        started = time.monotonic()
+        try:
+            result = self._classify(data, backend)
+        except (ValueError, BackendError, ConfigurationError) as e:
+            self._send(error_status(e), {"error": str(e)})
+        else:
+            result["segundos"] = round(time.monotonic() - started, 3)
+            self._send(200, result)
+
+    def _batch(self, data, backend):
+        items = data.get("items")
+        if not isinstance(items, list) or not items:
+            self._send(400, {"error": "Se esperaba una lista 'items'"})
+            return
+        if len(items) > MAX_BATCH_ITEMS:
+            self._send(413, {"error": f"Máximo {MAX_BATCH_ITEMS} items por lote"})
+            return
+        results = []
+        for number, item in enumerate(items, 1):
+            item_id = item.get("id", number) if isinstance(item, dict) else number
+            try:
+                if not isinstance(item, dict):
+                    raise ValueError("Cada item debe ser un objeto")
+                results.append({"id": item_id, "resultado": self._classify(item, backend)})
+            except (ValueError, BackendError, ConfigurationError) as e:
+                # `estado` distingue un item inválido (4xx) de una falla del modelo (5xx)
+                results.append({"id": item_id, "error": str(e), "estado": error_status(e)})
+        self._send(200, {"results": results})
+
+
+def serve(host="127.0.0.1", port=8080, workers=8, max_queue=64, backend="flash", api_key=None):
+    server = PoolHTTPServer((host, port), Handler, workers=workers, max_queue=max_queue,
+                            backend=backend, api_key=api_key)
+    server.socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m priorizador.server", description="API HTTP del priorizador.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--workers", type=int, default=8, help="Conexiones atendidas en paralelo")
+    parser.add_argument("--queue", type=int, default=64, help="Conexiones en espera antes de responder 503")
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default="flash")
+    args = parser.parse_args(argv)
+
+    server = serve(args.host, args.port, args.workers, args.queue, args.backend)
+    try:
+        server.warm_up()
+    except ConfigurationError as e:
+        raise SystemExit(str(e))
+    print(f"Escuchando en http://{args.host}:{args.port} (backend {args.backend}, {args.workers} workers)",
+          file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""Llamadas en curso compartidas: pedidos idénticos simultáneos esperan a la primera.
+
+La clave es la misma de la caché de resultados (`cache.make_key`), así que dos
+sesiones que priorizan la misma lista para el mismo rol generan una sola
+llamada al modelo aunque hagan clic con segundos de diferencia.
+"""
+import threading
+from concurrent.futures import Future
+
+
+class SingleFlight:
+    def __init__(self):
+        self._calls = {}  # clave -> Future del primer pedido
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.followers = 0
+
+    def claim(self, key):
+        """Devuelve (future, es_el_primero). Solo el primero debe hacer la llamada y luego `resolve`."""
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                self.followers += 1
+                return future, False
+            future = self._calls[key] = Future()
+            self.leaders += 1
+            return future, True
+
+    def resolve(self, key, future, result=None, error=None):
+        """Publica el resultado (o la excepción) a quienes esperan y libera la clave."""
+        with self._lock:
+            if self._calls.get(key) is future:
+                del self._calls[key]
+        if future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def stats(self):
+        with self._lock:
+            return {"in_flight": len(self._calls), "leaders": self.leaders, "followers": self.followers}
@@ -0,0 +1,179 @@
+"""Parser JSON incremental para la respuesta en streaming.
+
+Recibe los fragmentos de texto tal como llegan del modelo y emite cada tarea
+apenas se cierra su string (o su número, en la salida compacta) dentro del
+arreglo del cuadrante, sin esperar a que el JSON completo esté disponible.
+"""
+import json
+import time
+
+from priorizador.cache import split_tasks
+from priorizador.engine import (
+    QUADRANTS,
+    build_prompt,
+    call_timeout,
+    classify,
+    emit_result,
+    generation_config,
+    parse_response,
+    request_options,
+    resolve_item,
+)
+from priorizador.latency import TRACKER
+from priorizador.quota import within
+from priorizador.retry import DEFAULT_POLICY, RetryPolicy, is_retryable
+
+TIP_KEY = "recomendacion_top"
+
+
+class QuadrantStreamParser:
+    def __init__(self, lines=None):
+        # Con `lines`, los números de tarea se traducen al texto original
+        self.lines = lines
+        self._seen = set()
+        self._number = []
+        self.result = {quadrant: [] for quadrant in QUADRANTS}
+        self.result[TIP_KEY] = ""
+        self._started = False
+        self._stack = []  # "{" o "["
+        self._in_string = False
+        self._escape = False
+        self._buffer = []
+        self._key = None  # clave actual del objeto raíz
+        self._expect_key = False
+
+    def feed(self, text):
+        """Procesa un fragmento y devuelve la lista de eventos nuevos.
+
+        Cada evento es ("task", cuadrante, texto) o ("tip", None, texto).
+        """
+        events = []
+        for char in text:
+            if not self._started:
+                # Todo lo anterior a la primera llave (```json, prosa) se ignora
+                if char == "{":
+                    self._started = True
+                    self._stack.append("{")
+                    self._expect_key = True
+                continue
+            if not self._stack:
+                continue  # el objeto raíz ya cerró
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                    self._buffer.append(char)
+                elif char == "\\":
+                    self._escape = True
+                    self._buffer.append(char)
+                elif char == '"':
+                    self._in_string = False
+                    self._on_string("".join(self._buffer), events)
+                    self._buffer = []
+                else:
+                    self._buffer.append(char)
+                continue
+
+            if char.isdigit() and len(self._stack) == 2 and self._stack[-1] == "[":
+                self._number.append(char)
+                continue
+            if self._number:
+                self._on_item("".join(self._number), events)
+                self._number = []
+
+            if char == '"':
+                self._in_string = True
+            elif char in "{[":
+                self._stack.append(char)
+            elif char in "}]":
+                self._stack.pop()
+            elif char == ":" and len(self._stack) == 1:
+                self._expect_key = False
+            elif char == "," and len(self._stack) == 1:
+                self._expect_key = True
+        return events
+
+    @property
+    def done(self):
+        return self._started and not self._stack
+
+    def _on_string(self, raw, events):
+        try:
+            value = json.loads(f'"{raw}"')
+        except ValueError:
+            value = raw
+        depth = len(self._stack)
+        if depth == 1:
+            if self._expect_key:
+                self._key = value
+            elif self._key == TIP_KEY:
+                self.result[TIP_KEY] = value
+                events.append(("tip", None, value))
+        elif depth == 2 and self._stack[-1] == "[":
+            self._on_item(value, events)
+
+    def _on_item(self, item, events):
+        if self._key not in QUADRANTS:
+            return
+        value = resolve_item(item, self.lines)
+        if value is None or (self.lines is not None and value in self._seen):
+            return
+        self._seen.add(value)
+        self.result[self._key].append(value)
+        events.append(("task", self._key, value))
+
+
+def classify_stream(model, tasks, role, on_event, timeout=None, retry=DEFAULT_POLICY, deadline=None):
+    """Como engine.classify, pero con stream=True.
+
+    `on_event(tipo, cuadrante, texto)` se llama por cada tarea o consejo en
+    cuanto llega. Devuelve el dict completo al terminar. Si el stream falla por
+    algo pasajero, se reintenta sin streaming según `retry`; nada pasa de
+    `deadline` segundos (TimeoutError).
+    """
+    lines = split_tasks(tasks)
+    parser = QuadrantStreamParser(lines)
+    emitted = False
+    model_name = getattr(model, "model_name", "")
+    started = time.monotonic()
+    limit = None if deadline is None else started + deadline
+    retry = retry.within(deadline)
+    try:
+        chunks = []
+        with within(deadline):
+            response = model.generate_content(
+                build_prompt(lines, role, model=model),
+                generation_config=generation_config(model),
+                request_options=request_options(call_timeout(timeout, limit)),
+                stream=True,
+            )
+        for chunk in response:
+            # El timeout del pedido no corta un stream que sigue mandando trozos
+            if limit is not None and time.monotonic() > limit:
+                raise TimeoutError("Se superó el plazo del análisis")
+            text = chunk.text
+            chunks.append(text)
+            for kind, quadrant, value in parser.feed(text):
+                emitted = True
+                on_event(kind, quadrant, value)
+        # Si el stream no trajo un objeto completo: último intento con el texto entero
+        result = parser.result if parser.done else parse_response("".join(chunks), lines)
+        TRACKER.record(model_name, time.monotonic() - started)
+        return result
+    except Exception as e:
+        TRACKER.record_error(model_name)
+        if retry.attempts <= 1 or not is_retryable(e):
+            raise
+        delay = retry.delay(0, e)
+        if limit is not None and time.monotonic() + delay >= limit:
+            raise
+        time.sleep(delay)
+    # Los intentos siguientes van sin streaming; lo ya mostrado se corrige con el resultado final
+    elapsed = time.monotonic() - started
+    rest = RetryPolicy(retry.attempts - 1, retry.base, retry.cap,
+                       None if retry.deadline is None else retry.deadline - elapsed)
+    result = classify(model, lines, role, timeout=timeout, retry=rest,
+                      deadline=None if deadline is None else deadline - elapsed)
+    if not emitted:
+        emit_result(result, on_event)
+    return result
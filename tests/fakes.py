@@ -0,0 +1,43 @@
+"""Modelos falsos para probar el motor sin llamar a la API."""
+import json
+
+
+class FakeChunk:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeModel:
+    """GenerativeModel de mentira: entrega `replies` en orden.
+
+    Cada respuesta es un texto, una lista de fragmentos (para stream=True) o
+    una excepción que se lanza en esa llamada.
+    """
+
+    model_name = "falso"
+
+    def __init__(self, *replies):
+        self.replies = list(replies)
+        self.calls = []
+
+    def generate_content(self, contents, stream=False, **kwargs):
+        self.calls.append({"contents": contents, "stream": stream, **kwargs})
+        reply = self.replies.pop(0)
+        if isinstance(reply, BaseException):
+            raise reply
+        if stream:
+            return [FakeChunk(text) for text in (reply if isinstance(reply, list) else [reply])]
+        return FakeChunk("".join(reply) if isinstance(reply, list) else reply)
+
+    async def generate_content_async(self, contents, **kwargs):
+        return self.generate_content(contents, **kwargs)
+
+
+def matrix_json(hacer=(), planificar=(), delegar=(), eliminar=(), tip="foco"):
+    return json.dumps({
+        "hacer": list(hacer),
+        "planificar": list(planificar),
+        "delegar": list(delegar),
+        "eliminar": list(eliminar),
+        "recomendacion_top": tip,
+    }, ensure_ascii=False)
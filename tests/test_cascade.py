@@ -0,0 +1,70 @@
+import asyncio
+
+import pytest
+
+from priorizador import backends
+from priorizador.backends import Backend, CascadeBackend
+from priorizador.cache import ResultCache
+from priorizador.engine import CHUNK_MIN_SIZE
+from priorizador.memo import TaskMemo
+from priorizador.pipeline import Pipeline
+from priorizador.semantic import SemanticIndex
+from tests.fakes import FakeModel, matrix_json
+
+LINES = [f"Revisar expediente {n}" for n in range(1, CHUNK_MIN_SIZE + 6)]
+
+
+class Models:
+    def __init__(self, model):
+        self.model = model
+
+    def get(self, name):
+        return self.model
+
+
+class EmptyFirstTier(Backend):
+    """Primer nivel que no devuelve nada: todas las líneas suben."""
+
+    def classify(self, tasks, role, on_event=None, deadline=None, timeout=None):
+        return {"hacer": [], "planificar": [], "delegar": [], "eliminar": [], "recomendacion_top": ""}
+
+
+class FakeFlash(Backend):
+    def __init__(self, tmp_path, model):
+        self.pipeline = Pipeline(Models(model), cache=ResultCache(str(tmp_path / "r.sqlite3")),
+                                 memo=TaskMemo(str(tmp_path / "t.sqlite3")), semantic=SemanticIndex())
+        self.pipeline.distilled = None
+
+
+@pytest.fixture
+def cascade(tmp_path, monkeypatch):
+    model = FakeModel(matrix_json(hacer=range(1, len(LINES) + 1), tip="empezar por el 1"))
+    monkeypatch.setattr(backends, "_instances", {})
+    monkeypatch.setitem(backends.BACKENDS, "primero-falso", lambda api_key=None: EmptyFirstTier())
+    monkeypatch.setitem(backends.BACKENDS, "flash-falso", lambda api_key=None: FakeFlash(tmp_path, model))
+    return CascadeBackend(first="primero-falso", second="flash-falso"), model
+
+
+def test_escalated_lines_go_to_flash_in_one_call(cascade):
+    backend, model = cascade
+    result = backend.classify(LINES, "Abogado")
+    assert len(model.calls) == 1
+    assert result["hacer"] == LINES
+    assert result["recomendacion_top"] == "empezar por el 1"
+    assert backend.stats() == {"lineas": len(LINES), "escaladas": len(LINES)}
+
+
+def test_escalated_lines_stream_in_one_call(cascade):
+    backend, model = cascade
+    events = []
+    backend.classify(LINES, "Abogado", on_event=lambda *event: events.append(event))
+    assert len(model.calls) == 1 and model.calls[0]["stream"] is True
+    assert [event for event in events if event[0] == "task"] == [("task", "hacer", line) for line in LINES]
+    assert events[-1] == ("tip", None, "empezar por el 1")
+
+
+def test_async_escalation_is_one_call_too(cascade):
+    backend, model = cascade
+    result = asyncio.run(backend.aclassify(LINES, "Abogado"))
+    assert len(model.calls) == 1
+    assert result["hacer"] == LINES
@@ -0,0 +1,131 @@
+import datetime
+import sys
+import types
+
+import pytest
+
+from priorizador import context
+from priorizador.context import ContextModel, LocalContextModel, cache_name, context_model
+from priorizador.engine import build_prompt, system_instruction
+
+genai_module = pytest.importorskip("google.generativeai")
+
+FLASH = "models/gemini-2.5-flash"
+GEMMA = "models/gemma-3-1b-it"
+
+
+class FakeGenerativeModel:
+    def __init__(self, model_name, **kwargs):
+        self.model_name = model_name
+        self.kwargs = kwargs
+        self.prompts = []
+
+    @staticmethod
+    def from_cached_content(cached_content):
+        return FakeGenerativeModel(cached_content.model, cached_content=cached_content)
+
+    def generate_content(self, contents, **kwargs):
+        self.prompts.append(contents)
+        return contents
+
+
+class FakeCachedContent:
+    """CachedContent en memoria: cuenta las creaciones."""
+
+    entries = []
+    created = 0
+
+    def __init__(self, model, display_name, expire_time):
+        self.model = model
+        self.display_name = display_name
+        self.expire_time = expire_time
+
+    @classmethod
+    def list(cls):
+        return list(cls.entries)
+
+    @classmethod
+    def create(cls, model, display_name, system_instruction, ttl):
+        cls.created += 1
+        cached = cls(model, display_name, datetime.datetime.now(datetime.timezone.utc) + ttl)
+        cls.entries.append(cached)
+        return cached
+
+
+@pytest.fixture
+def genai():
+    return types.SimpleNamespace(GenerativeModel=FakeGenerativeModel)
+
+
+@pytest.fixture
+def caching(monkeypatch):
+    cached = type("CachedContent", (FakeCachedContent,), {"entries": [], "created": 0})
+    module = types.SimpleNamespace(CachedContent=cached)
+    monkeypatch.setitem(sys.modules, "google.generativeai.caching", module)
+    monkeypatch.setattr(genai_module, "caching", module, raising=False)
+    return cached
+
+
+def test_local_mode_prepends_the_instructions(genai):
+    model = context_model(genai, FLASH, mode="local")
+    assert isinstance(model, LocalContextModel) and model.kind == "local"
+    model.generate_content("Rol: x")
+    assert model._model.prompts == [f"{system_instruction()}\nRol: x"]
+
+
+def test_models_without_system_instruction_fall_back_to_local(genai):
+    model = context_model(genai, GEMMA, mode="instruccion")
+    assert isinstance(model, LocalContextModel)
+    assert model._model.kwargs == {}
+
+
+def test_instruction_mode_sends_the_system_instruction(genai):
+    model = context_model(genai, FLASH, mode="instruccion")
+    assert model.kind == "instruccion" and not model.expired
+    assert model._model.kwargs == {"system_instruction": system_instruction()}
+    model.generate_content("Rol: x")
+    assert model._model.prompts == ["Rol: x"]
+
+
+def test_provider_mode_below_the_minimum_skips_the_cache(genai, caching):
+    model = context_model(genai, FLASH, mode="proveedor")
+    assert model.kind == "instruccion"
+    assert caching.created == 0
+
+
+def test_provider_cache_is_created_once_and_reused(genai, caching, monkeypatch):
+    monkeypatch.setattr(context, "PROVIDER_MIN_TOKENS", 0)
+    first = context_model(genai, FLASH, mode="proveedor")
+    second = context_model(genai, FLASH, mode="proveedor")
+    assert first.kind == second.kind == "proveedor"
+    assert caching.created == 1
+    assert second._model.kwargs["cached_content"].display_name == cache_name(FLASH)
+
+
+def test_provider_cache_about_to_expire_is_not_reused(genai, caching, monkeypatch):
+    monkeypatch.setattr(context, "PROVIDER_MIN_TOKENS", 0)
+    soon = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(seconds=context.RENEW_MARGIN / 2)
+    caching.entries.append(caching(FLASH, cache_name(FLASH), soon))
+    model = context_model(genai, FLASH, mode="proveedor")
+    assert caching.created == 1
+    assert model._model.kwargs["cached_content"].expire_time > soon
+
+
+def test_provider_failure_falls_back_to_system_instruction(genai, caching, monkeypatch):
+    monkeypatch.setattr(context, "PROVIDER_MIN_TOKENS", 0)
+
+    def refuse(cls, **kwargs):
+        raise PermissionError("sin caché en este plan")
+
+    monkeypatch.setattr(caching, "create", classmethod(refuse))
+    model = context_model(genai, FLASH, mode="proveedor")
+    assert model.kind == "instruccion"
+
+
+def test_build_prompt_leaves_out_the_fixed_part_for_context_models(genai):
+    plain = build_prompt(["Pagar luz"], "Rol")
+    assert plain.startswith(system_instruction())
+    for ctx in (context_model(genai, FLASH, mode="instruccion"), ContextModel(object(), "proveedor")):
+        prompt = build_prompt(["Pagar luz"], "Rol", model=ctx)
+        assert system_instruction() not in prompt
+        assert plain.endswith(prompt)
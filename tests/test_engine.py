@@ -0,0 +1,133 @@
+import pytest
+
+from priorizador.engine import (
+    build_prompt,
+    classify,
+    emit_result,
+    extract_json,
+    generation_config,
+    parse_response,
+    resolve_item,
+)
+from priorizador.errors import ResponseFormatError
+from priorizador.retry import RetryPolicy
+from tests.fakes import FakeModel, matrix_json
+
+
+def test_extract_json_plain_object():
+    assert extract_json('{"a": 1}') == {"a": 1}
+
+
+def test_extract_json_inside_markdown_fence():
+    assert extract_json('```json\n{"hacer": ["A"]}\n```') == {"hacer": ["A"]}
+
+
+def test_extract_json_with_prose_and_braces_in_strings():
+    text = 'Aquí va: {"hacer": ["Cerrar {ticket} \\"urgente\\""], "x": {"y": 1}} y nada más }'
+    assert extract_json(text) == {"hacer": ['Cerrar {ticket} "urgente"'], "x": {"y": 1}}
+
+
+def test_extract_json_skips_a_broken_object_before_a_good_one():
+    assert extract_json('{roto} luego {"ok": true}') == {"ok": True}
+
+
+@pytest.mark.parametrize("text", ["", "sin json", '{"hacer": ["A"', "```json\n{\n```"])
+def test_extract_json_rejects_text_without_an_object(text):
+    with pytest.raises(ResponseFormatError):
+        extract_json(text)
+
+
+def test_response_format_error_is_a_value_error():
+    # Lo usan quienes atrapan ValueError; el servidor igual lo trata como falla del modelo
+    assert issubclass(ResponseFormatError, ValueError)
+
+
+def test_parse_response_fills_missing_quadrants():
+    result = parse_response('{"hacer": ["A"]}')
+    assert result == {"hacer": ["A"], "planificar": [], "delegar": [], "eliminar": [], "recomendacion_top": ""}
+
+
+def test_parse_response_rejects_non_object_json():
+    with pytest.raises(ResponseFormatError):
+        parse_response('["A", "B"]')
+
+
+def test_parse_response_accepts_a_single_item_instead_of_a_list():
+    assert parse_response('{"hacer": "A", "recomendacion_top": null}')["hacer"] == ["A"]
+
+
+def test_generation_config_uses_schema_except_for_gemma():
+    class Flash:
+        model_name = "models/gemini-2.5-flash"
+
+    class Gemma:
+        model_name = "models/gemma-3-1b-it"
+
+    config = generation_config(Flash())
+    assert config["response_mime_type"] == "application/json"
+    assert set(config["response_schema"]["required"]) >= {"hacer", "planificar", "delegar", "eliminar"}
+    assert generation_config(Gemma()) is None
+
+
+def test_classify_retries_a_malformed_reply():
+    model = FakeModel("no es JSON", matrix_json(hacer=[1]))
+    result = classify(model, ["A"], "Rol", retry=RetryPolicy(attempts=2, base=0, cap=0))
+    assert result["hacer"] == ["A"]
+    assert len(model.calls) == 2
+
+
+# --- SALIDA COMPACTA: NÚMEROS DE TAREA ---
+LINES = ["Pagar luz", "Informe", "Ver series"]
+
+
+@pytest.mark.parametrize("item, expected", [
+    (1, "Pagar luz"), (3, "Ver series"), ("2", "Informe"), (" 2 ", "Informe"), (2.0, "Informe"),
+])
+def test_resolve_item_maps_numbers_to_task_text(item, expected):
+    assert resolve_item(item, LINES) == expected
+
+
+@pytest.mark.parametrize("item", [0, 4, -1, "0", "99"])
+def test_resolve_item_out_of_range_is_dropped(item):
+    assert resolve_item(item, LINES) is None
+
+
+def test_resolve_item_keeps_text_and_odd_values_as_text():
+    assert resolve_item("Pagar luz", LINES) == "Pagar luz"
+    assert resolve_item(True, LINES) == "True"
+    assert resolve_item(1.5, LINES) == "1.5"
+    # Sin `lines` (salida con texto) nada se traduce
+    assert resolve_item(1, None) == "1"
+
+
+def test_parse_response_translates_indices_and_drops_duplicates():
+    text = '{"hacer":[1,1],"planificar":[2,"1"],"delegar":[7],"eliminar":[3,0],"recomendacion_top":"t"}'
+    result = parse_response(text, LINES)
+    # Cada tarea queda en el primer cuadrante que la nombra; los números inválidos se ignoran
+    assert result == {
+        "hacer": ["Pagar luz"], "planificar": ["Informe"], "delegar": [], "eliminar": ["Ver series"],
+        "recomendacion_top": "t",
+    }
+
+
+def test_compact_prompt_numbers_tasks_from_one():
+    prompt = build_prompt(LINES, "Abogado", compact=True)
+    assert "1. Pagar luz\n2. Informe\n3. Ver series" in prompt
+    assert 'Rol: "Abogado"' in prompt
+
+
+def test_classify_returns_original_text_for_numbered_reply():
+    model = FakeModel(matrix_json(hacer=[3], eliminar=[1, 2]))
+    result = classify(model, LINES, "Rol")
+    assert result["hacer"] == ["Ver series"]
+    assert result["eliminar"] == ["Pagar luz", "Informe"]
+
+
+def test_emit_result_reports_tasks_in_quadrant_order_then_the_tip():
+    events = []
+    result = {"eliminar": ["D"], "hacer": ["A", "B"], "planificar": [], "recomendacion_top": "t"}
+    emit_result(result, lambda *event: events.append(event))
+    assert events == [("task", "hacer", "A"), ("task", "hacer", "B"), ("task", "eliminar", "D"), ("tip", None, "t")]
+    events.clear()
+    emit_result(result, lambda *event: events.append(event), tip=False)
+    assert events[-1] == ("task", "eliminar", "D")
@@ -0,0 +1,64 @@
+import io
+
+import pytest
+
+from priorizador.ingest import iter_batches, iter_rows, iter_tasks
+
+
+def tasks_of(data, filename="tareas.csv"):
+    return [row["tarea"] for row in iter_rows(data, filename)]
+
+
+def test_one_task_per_line_with_header():
+    assert tasks_of(b"tarea\nPagar impuestos\nLlamar contador\n") == ["Pagar impuestos", "Llamar contador"]
+
+
+def test_one_task_per_line_without_header_keeps_the_first_row():
+    data = b"Pagar impuestos\nLlamar contador\nVer Netflix\n"
+    assert tasks_of(data) == ["Pagar impuestos", "Llamar contador", "Ver Netflix"]
+
+
+def test_semicolon_file_with_bom_and_optional_columns():
+    data = "\ufefftarea;vence;responsable\nPagar luz;01/02/2026;Ana\nLlamar, hoy;;\n".encode("utf-8")
+    rows = list(iter_rows(data, "tareas.csv"))
+    assert rows[0] == {"tarea": "Pagar luz", "vence": "01/02/2026", "responsable": "Ana"}
+    # La coma es parte del texto cuando el separador es punto y coma
+    assert rows[1]["tarea"] == "Llamar, hoy"
+
+
+def test_tab_separated_with_role_column():
+    rows = list(iter_rows(b"Tarea\tRol\nRevisar contrato X\tAbogado\n", "tareas.txt"))
+    assert rows == [{"tarea": "Revisar contrato X", "rol": "Abogado"}]
+
+
+def test_headerless_xlsx_keeps_the_first_row():
+    openpyxl = pytest.importorskip("openpyxl")
+    workbook = openpyxl.Workbook()
+    for task in ("Pagar impuestos", "Llamar contador"):
+        workbook.active.append([task])
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    assert tasks_of(buffer.getvalue(), "tareas.xlsx") == ["Pagar impuestos", "Llamar contador"]
+
+
+def test_unsupported_extension():
+    with pytest.raises(ValueError):
+        iter_rows(b"x", "tareas.pdf")
+
+
+def test_iter_tasks_adds_hints_skips_blanks_and_duplicates():
+    rows = [
+        {"tarea": "Pagar luz", "vence": "01/02", "responsable": ""},
+        {"tarea": ""},
+        {"tarea": "pagar  LUZ", "vence": "01/02"},
+        {"tarea": "Informe", "responsable": "Ana", "rol": "Jefe"},
+    ]
+    assert list(iter_tasks(rows, "Rol")) == [
+        ("Rol", "Pagar luz (vence 01/02)"),
+        ("Jefe", "Informe (responsable: Ana)"),
+    ]
+
+
+def test_iter_batches_groups_by_role_and_size():
+    tasks = [("A", "1"), ("B", "2"), ("A", "3"), ("A", "4")]
+    assert sorted(iter_batches(tasks, size=2)) == [("A", ["1", "3"]), ("A", ["4"]), ("B", ["2"])]
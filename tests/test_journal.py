@@ -0,0 +1,50 @@
+import json
+
+from priorizador.journal import Journal
+
+
+def test_resume_skips_done_ids_and_reuses_outputs(tmp_path):
+    path = tmp_path / "bitacora.jsonl"
+    journal = Journal(str(path), fsync=False)
+    journal.record(1, "k1", {"hacer": ["A"]})
+    journal.close()
+
+    resumed = Journal(str(path), fsync=False)
+    assert resumed.is_done(1) and not resumed.is_done(2)
+    assert resumed.lookup("k1") == {"hacer": ["A"]}
+    assert resumed.lookup("otra") is None
+    resumed.close()
+
+
+def test_torn_last_line_does_not_swallow_the_next_record(tmp_path):
+    path = tmp_path / "bitacora.jsonl"
+    journal = Journal(str(path), fsync=False)
+    journal.record(1, "k1", "uno")
+    journal.close()
+    # Caída a mitad de escribir el registro 2
+    with open(path, "a", encoding="utf-8") as handle:
+        handle.write(json.dumps({"id": 2, "key": "k2", "output": "dos"})[:15])
+
+    resumed = Journal(str(path), fsync=False)
+    assert len(resumed) == 1 and not resumed.is_done(2)
+    resumed.record(2, "k2", "dos")
+    resumed.record(3, "k3", "tres")
+    resumed.close()
+
+    reloaded = Journal(str(path), fsync=False)
+    assert sorted(reloaded.ids) == [1, 2, 3]
+    assert reloaded.lookup("k3") == "tres"
+    reloaded.close()
+    assert all(json.loads(line) for line in path.read_text(encoding="utf-8").splitlines())
+
+
+def test_torn_line_longer_than_a_repair_block(tmp_path, monkeypatch):
+    monkeypatch.setattr("priorizador.journal.REPAIR_BLOCK", 8)
+    path = tmp_path / "bitacora.jsonl"
+    journal = Journal(str(path), fsync=False)
+    journal.record(1, "k1", "uno")
+    journal.close()
+    with open(path, "a", encoding="utf-8") as handle:
+        handle.write('{"id": 2, "key": "k2", "output": "cortado a mitad')
+    Journal(str(path), fsync=False).close()
+    assert [json.loads(line)["id"] for line in path.read_text(encoding="utf-8").splitlines()] == [1]
@@ -0,0 +1,162 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import CancelledError
+
+import pytest
+
+from priorizador.quota import QuotaLimiter, ThrottledModel, session, within
+from tests.fakes import FakeModel
+
+
+class ManualBuckets:
+    """Baldes controlados por la prueba: cada `release()` deja pasar una llamada."""
+
+    def __init__(self, available=0):
+        self.available = available
+        self._lock = threading.Lock()
+
+    def release(self, n=1):
+        with self._lock:
+            self.available += n
+
+    def take(self, costs, limits):
+        with self._lock:
+            if self.available > 0:
+                self.available -= 1
+                return 0
+            return 0.005
+
+
+def limiter(available=0):
+    return QuotaLimiter("falso", rpm=60, tpm=0, buckets=ManualBuckets(available))
+
+
+def wait_until(condition, timeout=2):
+    limit = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < limit, "la condición no se cumplió a tiempo"
+        time.sleep(0.001)
+
+
+def test_position_takes_one_turn_per_session_in_rounds():
+    q = limiter()
+    q._queues = OrderedDict([("a", deque([0, 1, 2])), ("b", deque([3])), ("c", deque([4, 5]))])
+    # Ronda 1: a0, b3, c4; ronda 2: a1, c5; ronda 3: a2
+    assert [q._position("a", 0), q._position("b", 3), q._position("c", 4)] == [1, 2, 3]
+    assert [q._position("a", 1), q._position("c", 5), q._position("a", 2)] == [4, 5, 6]
+
+
+def test_acquire_without_queue_and_with_quota_does_not_wait():
+    q = limiter(available=1)
+    assert q.acquire(session="a") == 0.0
+    assert q.waits == 0
+
+
+def test_a_big_session_does_not_starve_a_small_one():
+    q = limiter()
+    served = []
+
+    def call(name):
+        q.acquire(session=name[0])
+        served.append(name)
+
+    threads = []
+    for number, name in enumerate(["a1", "a2", "a3", "b1"], 1):
+        thread = threading.Thread(target=call, args=(name,))
+        thread.start()
+        threads.append(thread)
+        wait_until(lambda: q.queued == number)
+    for number in range(1, 5):
+        q.buckets.release()
+        wait_until(lambda: len(served) == number)
+    for thread in threads:
+        thread.join()
+    assert served == ["a1", "b1", "a2", "a3"]
+
+
+def test_on_wait_reports_position_and_zero_when_leaving():
+    q = limiter()
+    positions = []
+    thread = threading.Thread(target=q.acquire, kwargs={"session": "a", "on_wait": positions.append})
+    thread.start()
+    wait_until(lambda: positions == [1])
+    q.buckets.release()
+    thread.join(2)
+    assert positions == [1, 0]
+
+
+def test_timeout_leaves_the_queue():
+    q = limiter()
+    with pytest.raises(TimeoutError):
+        q.acquire(session="a", timeout=0.02)
+    assert q.queued == 0
+
+
+def test_cancelled_event_leaves_the_queue_without_taking_quota():
+    q = limiter()
+    cancelled = threading.Event()
+    errors = []
+
+    def call():
+        try:
+            q.acquire(session="a", cancelled=cancelled)
+        except CancelledError as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=call)
+    thread.start()
+    wait_until(lambda: q.queued == 1)
+    q.cancel(cancelled)
+    thread.join(2)
+    assert errors and q.queued == 0
+    q.buckets.release()
+    assert q.buckets.available == 1
+
+
+def test_cancelling_acquire_async_frees_the_turn():
+    q = limiter()
+
+    async def main():
+        task = asyncio.create_task(q.acquire_async(session="a"))
+        await asyncio.to_thread(wait_until, lambda: q.queued == 1)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(main())
+    wait_until(lambda: q.queued == 0)
+    q.buckets.release()
+    # Nadie consumió la cuota liberada: el turno cancelado ya no estaba en la fila
+    time.sleep(0.02)
+    assert q.buckets.available == 1
+
+
+def test_throttled_model_queues_as_the_current_session_within_the_deadline():
+    q = limiter()
+    model = ThrottledModel(FakeModel("ok"), q)
+    with session("s1"), within(0.02):
+        with pytest.raises(TimeoutError):
+            model.generate_content("hola")
+    assert model.calls == []
+    q.buckets.release()
+    assert model.generate_content("hola").text == "ok"
+
+
+def test_throttled_model_clips_the_call_timeout_to_what_is_left_after_queueing():
+    q = limiter()
+    model = ThrottledModel(FakeModel("ok"), q)
+    threading.Timer(0.1, q.buckets.release).start()
+    with within(0.5):
+        model.generate_content("hola", request_options={"timeout": 30})
+    # La espera en la fila ya se comió parte del plazo
+    assert model.calls[0]["request_options"]["timeout"] <= 0.4
+
+
+def test_nested_within_keeps_the_shorter_deadline():
+    q = limiter(available=1)
+    model = ThrottledModel(FakeModel("ok"), q)
+    with within(0.2), within(60):
+        model.generate_content("hola")
+    assert model.calls[0]["request_options"]["timeout"] <= 0.2
@@ -0,0 +1,125 @@
+import asyncio
+import datetime
+
+import pytest
+
+from priorizador.errors import ResponseFormatError
+from priorizador.retry import RetryPolicy, is_retryable, retry_after, status_code
+
+
+class ApiError(Exception):
+    """Imita las excepciones de google.api_core: `.code` numérico y `.response` opcional."""
+
+    def __init__(self, code, message="", headers=None, details=None):
+        super().__init__(message)
+        self.code = code
+        self.response = type("Response", (), {"headers": headers or {}})()
+        self.details = details or []
+
+
+class GrpcError(Exception):
+    def code(self):
+        return "UNAVAILABLE"
+
+
+@pytest.mark.parametrize("error", [
+    ApiError(429), ApiError(500), ApiError(503), ApiError(504), ApiError(408),
+    TimeoutError(), asyncio.TimeoutError(), ConnectionResetError(), ResponseFormatError("cortado"),
+])
+def test_transient_errors_are_retried(error):
+    assert is_retryable(error)
+
+
+@pytest.mark.parametrize("error", [
+    ApiError(400), ApiError(401), ApiError(403), ApiError(404), ValueError("x"), PermissionError(), GrpcError(),
+])
+def test_permanent_errors_are_not_retried(error):
+    assert not is_retryable(error)
+
+
+def test_status_code_ignores_grpc_style_code_methods():
+    assert status_code(ApiError(429)) == 429
+    assert status_code(GrpcError()) is None
+
+
+def test_retry_after_reads_header_details_or_message():
+    assert retry_after(ApiError(429, headers={"Retry-After": "3"})) == 3.0
+    assert retry_after(ApiError(429, details=[type("D", (), {"retry_delay": datetime.timedelta(seconds=2)})()])) == 2.0
+    assert retry_after(ApiError(429, "Quota exceeded, please retry in 7.5s.")) == 7.5
+    assert retry_after(ApiError(429, "sin pista")) is None
+
+
+def test_delay_is_full_jitter_capped_and_respects_server_hint():
+    policy = RetryPolicy(base=1, cap=4)
+    for attempt in range(6):
+        assert 0 <= policy.delay(attempt, ApiError(503)) <= min(4, 2 ** attempt)
+    assert policy.delay(0, ApiError(429, headers={"Retry-After": "10"})) == 10
+
+
+class Flaky:
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return outcome
+
+
+def test_call_retries_until_success(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr("priorizador.retry.time.sleep", sleeps.append)
+    fn = Flaky(ApiError(503), ApiError(429), "ok")
+    assert RetryPolicy(attempts=4, base=0.1, cap=1).call(fn) == "ok"
+    assert fn.calls == 3 and len(sleeps) == 2
+
+
+def test_call_fails_fast_on_permanent_error(monkeypatch):
+    monkeypatch.setattr("priorizador.retry.time.sleep", lambda seconds: pytest.fail("no debía esperar"))
+    fn = Flaky(ApiError(403), "ok")
+    with pytest.raises(ApiError):
+        RetryPolicy().call(fn)
+    assert fn.calls == 1
+
+
+def test_call_stops_after_the_last_attempt(monkeypatch):
+    monkeypatch.setattr("priorizador.retry.time.sleep", lambda seconds: None)
+    fn = Flaky(*[ApiError(503)] * 5)
+    with pytest.raises(ApiError):
+        RetryPolicy(attempts=3).call(fn)
+    assert fn.calls == 3
+
+
+def test_call_does_not_sleep_past_the_deadline(monkeypatch):
+    monkeypatch.setattr("priorizador.retry.time.sleep", lambda seconds: pytest.fail("no debía esperar"))
+    # El servidor pide 30 s pero el plazo total es 5 s: se rinde de inmediato
+    fn = Flaky(ApiError(429, headers={"Retry-After": "30"}), "ok")
+    with pytest.raises(ApiError):
+        RetryPolicy(deadline=5).call(fn)
+    assert fn.calls == 1
+
+
+def test_within_only_tightens_the_deadline():
+    policy = RetryPolicy(attempts=3, deadline=60)
+    assert policy.within(None) is policy
+    assert policy.within(10).deadline == 10
+    assert policy.within(100).deadline == 60
+    assert RetryPolicy(deadline=None).within(5).deadline == 5
+    assert policy.within(10).attempts == 3
+
+
+def test_acall_retries_async_functions(monkeypatch):
+    async def no_sleep(seconds):
+        pass
+
+    monkeypatch.setattr("priorizador.retry.asyncio.sleep", no_sleep)
+    fn = Flaky(TimeoutError(), "ok")
+
+    async def attempt():
+        return fn()
+
+    assert asyncio.run(RetryPolicy(attempts=2).acall(attempt)) == "ok"
+    assert fn.calls == 2
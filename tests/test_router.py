@@ -0,0 +1,65 @@
+from priorizador.latency import LatencyTracker
+from priorizador.router import SMALL_LIST, RouteLog, choose
+
+CLEAR = ["Pagar impuestos hoy urgente", "Ver Netflix"]
+
+
+def tracker_with(name, seconds=1.0, errors=0, calls=20):
+    """Tracker con `calls` llamadas a `name` tal como las registra el SDK ("models/...")."""
+    tracker = LatencyTracker()
+    for number in range(calls):
+        if number < errors:
+            tracker.record_error(f"models/{name}")
+        else:
+            tracker.record(f"models/{name}", seconds)
+    return tracker
+
+
+def test_tracker_treats_sdk_and_short_names_alike():
+    tracker = tracker_with("gemini-2.5-flash", seconds=2.0)
+    assert tracker.percentile("gemini-2.5-flash", 0.95) == 2.0
+    assert tracker.error_rate("gemini-2.5-flash") == 0
+
+
+def test_failing_flash_routes_to_gemma():
+    route = choose(["a"] * (SMALL_LIST + 5), "Rol", tracker=tracker_with("gemini-2.5-flash", errors=20))
+    assert route.backend == "gemma"
+    assert "flash" in route.reason
+
+
+def test_failing_gemma_routes_to_flash():
+    route = choose(CLEAR, "Rol", tracker=tracker_with("gemma-3-1b-it", errors=20))
+    assert route.backend == "flash"
+
+
+def test_slow_flash_over_budget_routes_to_gemma():
+    tracker = tracker_with("gemini-2.5-flash", seconds=40)
+    for _ in range(20):
+        tracker.record("models/gemma-3-1b-it", 1.0)
+    route = choose(["a"] * (SMALL_LIST + 5), "Rol", budget=5, tracker=tracker)
+    assert route.backend == "gemma"
+    assert "presupuesto" in route.reason
+
+
+def test_slow_gemma_over_budget_routes_to_flash():
+    tracker = tracker_with("gemma-3-1b-it", seconds=40)
+    for _ in range(20):
+        tracker.record("models/gemini-2.5-flash", 1.0)
+    assert choose(CLEAR, "Rol", budget=5, tracker=tracker).backend == "flash"
+
+
+def test_workload_decides_without_history():
+    tracker = LatencyTracker()
+    big = choose([f"tarea {n}" for n in range(SMALL_LIST + 1)], "Rol", tracker=tracker)
+    assert big.backend == "flash" and big.lines == SMALL_LIST + 1
+    assert choose(CLEAR, "Rol", tracker=tracker).backend == "gemma"
+    assert choose(["xyzzy", "foo bar"], "Rol", tracker=tracker).backend == "flash"
+
+
+def test_route_log_counts_decisions():
+    log = RouteLog(size=2)
+    tracker = LatencyTracker()
+    for tasks in (CLEAR, CLEAR, ["xyzzy"]):
+        log.record(choose(tasks, "Rol", tracker=tracker), budget=5)
+    assert log.counts() == {"gemma": 1, "flash": 1}
+    assert log.recent()[-1]["presupuesto"] == 5
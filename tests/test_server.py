@@ -0,0 +1,74 @@
+import http.client
+import json
+import threading
+
+import pytest
+
+from priorizador.errors import (
+    BackendError,
+    ConfigurationError,
+    DeadlineExceeded,
+    ResponseFormatError,
+    TokenBudgetExceeded,
+)
+from priorizador.server import error_status, serve
+
+
+@pytest.mark.parametrize("error, status", [
+    (ResponseFormatError("x"), 502),
+    (BackendError("x"), 502),
+    (DeadlineExceeded("x"), 504),
+    (ConfigurationError("x"), 500),
+    (TokenBudgetExceeded("x"), 413),
+    (ValueError("x"), 400),
+])
+def test_error_status(error, status):
+    assert error_status(error) == status
+
+
+@pytest.fixture
+def server():
+    httpd = serve(port=0, workers=2, backend="reglas")
+    httpd.warm_up()
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def post(server, path, payload):
+    connection = http.client.HTTPConnection("127.0.0.1", server.server_address[1], timeout=5)
+    try:
+        connection.request("POST", path, json.dumps(payload), {"Content-Type": "application/json"})
+        response = connection.getresponse()
+        return response.status, json.loads(response.read())
+    finally:
+        connection.close()
+
+
+def test_prioritize_ok(server):
+    status, body = post(server, "/v1/prioritize", {"rol": "Abogado", "tareas": ["Pagar impuestos hoy"]})
+    assert status == 200
+    assert body["backend"] == "reglas"
+    assert sum(len(body[quadrant]) for quadrant in ("hacer", "planificar", "delegar", "eliminar")) == 1
+
+
+@pytest.mark.parametrize("payload", [
+    {"tareas": 5},
+    {"tareas": ["ok", 3]},
+    {"tareas": {"a": 1}},
+    {"tareas": "ok", "rol": ["x"]},
+    {"tareas": "ok", "presupuesto": "rápido"},
+])
+def test_invalid_items_get_400(server, payload):
+    status, body = post(server, "/v1/prioritize", payload)
+    assert status == 400 and body["error"]
+
+
+def test_batch_keeps_going_after_a_bad_item(server):
+    status, body = post(server, "/v1/prioritize/batch", {"items": [{"id": "a", "tareas": 5}, {"id": "b", "tareas": "Ver Netflix"}]})
+    assert status == 200
+    bad, good = body["results"]
+    assert bad["id"] == "a" and bad["estado"] == 400
+    assert good["id"] == "b" and "resultado" in good
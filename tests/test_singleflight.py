@@ -0,0 +1,141 @@
+import threading
+import time
+
+import pytest
+
+from priorizador.cache import ResultCache
+from priorizador.errors import BackendError
+from priorizador.memo import TaskMemo
+from priorizador.pipeline import Pipeline
+from priorizador.semantic import SemanticIndex
+from priorizador.singleflight import SingleFlight
+from tests.fakes import FakeModel, matrix_json
+
+
+def test_first_claim_leads_and_the_rest_follow():
+    flights = SingleFlight()
+    future, leader = flights.claim("k")
+    same, follower = flights.claim("k")
+    assert leader and not follower and same is future
+    flights.resolve("k", future, {"ok": 1})
+    assert same.result(0) == {"ok": 1}
+    assert flights.stats() == {"in_flight": 0, "leaders": 1, "followers": 1}
+
+
+def test_error_reaches_every_follower_and_frees_the_key():
+    flights = SingleFlight()
+    future, _ = flights.claim("k")
+    follower, _ = flights.claim("k")
+    flights.resolve("k", future, error=BackendError("sin modelo"))
+    with pytest.raises(BackendError, match="sin modelo"):
+        follower.result(0)
+    # La clave quedó libre: el próximo pedido vuelve a intentar
+    _, leader = flights.claim("k")
+    assert leader
+
+
+def test_resolving_twice_keeps_the_first_outcome():
+    flights = SingleFlight()
+    future, _ = flights.claim("k")
+    flights.resolve("k", future, "primero")
+    flights.resolve("k", future, error=BackendError("tarde"))
+    assert future.result(0) == "primero"
+
+
+class Models:
+    def __init__(self, model):
+        self.model = model
+
+    def get(self, name):
+        return self.model
+
+
+class SlowModel(FakeModel):
+    """Espera `gate` antes de responder, para que otros pedidos lleguen mientras tanto."""
+
+    def __init__(self, *replies):
+        super().__init__(*replies)
+        self.gate = threading.Event()
+        self.started = threading.Event()
+
+    def generate_content(self, contents, **kwargs):
+        self.started.set()
+        assert self.gate.wait(2)
+        return super().generate_content(contents, **kwargs)
+
+
+def pipeline(tmp_path, model, cache=None):
+    built = Pipeline(Models(model), cache=cache or ResultCache(str(tmp_path / "r.sqlite3")),
+                     memo=TaskMemo(str(tmp_path / "t.sqlite3")), semantic=SemanticIndex())
+    built.distilled = None
+    return built
+
+
+def test_identical_concurrent_requests_make_one_model_call(tmp_path):
+    model = SlowModel(matrix_json(hacer=[1], planificar=[2]))
+    flow = pipeline(tmp_path, model)
+    results = []
+
+    def run():
+        results.append(flow.run("Pagar luz\nInforme", "Rol", on_event=lambda *event: None))
+
+    first = threading.Thread(target=run)
+    first.start()
+    assert model.started.wait(2)
+    second = threading.Thread(target=run)
+    second.start()
+    time.sleep(0.05)
+    model.gate.set()
+    first.join(2)
+    second.join(2)
+    assert len(model.calls) == 1
+    assert results[0] == results[1]
+    assert results[0]["hacer"] == ["Pagar luz"]
+
+
+def test_leader_failure_propagates_to_followers(tmp_path):
+    model = SlowModel(PermissionError("clave inválida"))
+    flow = pipeline(tmp_path, model)
+    errors = []
+
+    def run():
+        try:
+            flow.run("Pagar luz", "Rol", on_event=lambda *event: None)
+        except Exception as e:
+            errors.append(e)
+
+    first = threading.Thread(target=run)
+    first.start()
+    assert model.started.wait(2)
+    second = threading.Thread(target=run)
+    second.start()
+    time.sleep(0.05)
+    model.gate.set()
+    first.join(2)
+    second.join(2)
+    assert len(model.calls) == 1
+    assert [type(e) for e in errors] == [PermissionError, PermissionError]
+
+
+class RacingCache(ResultCache):
+    """La primera consulta no encuentra nada; para la segunda el líder anterior ya guardó."""
+
+    def __init__(self, path, result):
+        super().__init__(path)
+        self.result = result
+        self.lookups = 0
+
+    def get(self, key):
+        self.lookups += 1
+        return None if self.lookups == 1 else self.result
+
+
+def test_new_leader_rechecks_the_cache_before_calling_the_model(tmp_path):
+    stored = {"hacer": ["Pagar luz"], "planificar": [], "delegar": [], "eliminar": [], "recomendacion_top": "x"}
+    model = FakeModel()
+    flow = pipeline(tmp_path, model, cache=RacingCache(str(tmp_path / "r.sqlite3"), stored))
+    events = []
+    assert flow.run("Pagar luz", "Rol", on_event=lambda *event: events.append(event)) == stored
+    assert model.calls == []
+    assert events == [("task", "hacer", "Pagar luz"), ("tip", None, "x")]
+    assert flow.flights.stats()["in_flight"] == 0
@@ -0,0 +1,119 @@
+import time
+
+import pytest
+
+from priorizador.retry import RetryPolicy
+from priorizador.streaming import QuadrantStreamParser, classify_stream
+from tests.fakes import FakeChunk, FakeModel, matrix_json
+
+
+def feed_all(parser, pieces):
+    events = []
+    for piece in pieces:
+        events.extend(parser.feed(piece))
+    return events
+
+
+def one_char_at_a_time(text):
+    return list(text)
+
+
+def test_emits_tasks_as_each_string_closes():
+    parser = QuadrantStreamParser()
+    events = parser.feed('{"hacer":["Pagar luz",')
+    assert events == [("task", "hacer", "Pagar luz")]
+    assert not parser.done
+    events = parser.feed('"Llamar"],"planificar":[],"recomendacion_top":"Empieza ya"}')
+    assert events == [("task", "hacer", "Llamar"), ("tip", None, "Empieza ya")]
+    assert parser.done
+
+
+def test_chunks_split_anywhere_give_the_same_result():
+    text = matrix_json(hacer=["Pagar luz"], planificar=["Informe"], eliminar=["Ver series"], tip="Hoy: luz")
+    whole = QuadrantStreamParser()
+    split = QuadrantStreamParser()
+    assert feed_all(whole, [text]) == feed_all(split, one_char_at_a_time(text))
+    assert split.result == whole.result
+    assert split.result["eliminar"] == ["Ver series"]
+
+
+def test_ignores_fences_and_prose_around_the_object():
+    parser = QuadrantStreamParser()
+    events = feed_all(parser, ["Claro:\n```json\n{\"hacer\":[\"A\"]", ",\"recomendacion_top\":\"x\"}\n```\nListo {no}"])
+    assert events == [("task", "hacer", "A"), ("tip", None, "x")]
+    assert parser.result["hacer"] == ["A"]
+
+
+def test_escapes_survive_split_chunks():
+    parser = QuadrantStreamParser()
+    events = feed_all(parser, ['{"hacer":["Leer \\', '"El Quijote\\"', ' y \\u00f1and\\u00fa \\\\ ok"]}'])
+    assert events == [("task", "hacer", 'Leer "El Quijote" y ñandú \\ ok')]
+
+
+def test_brackets_and_commas_inside_strings_are_text():
+    parser = QuadrantStreamParser()
+    events = feed_all(parser, ['{"hacer":["Revisar [v2], {borrador}: listo"],"planificar":["B"]}'])
+    assert [value for _, _, value in events] == ["Revisar [v2], {borrador}: listo", "B"]
+
+
+def test_numeric_indices_map_to_task_text():
+    lines = ["Pagar luz", "Informe", "Ver series"]
+    parser = QuadrantStreamParser(lines)
+    events = feed_all(parser, ['{"hacer":[1', '0', ',3],"planificar":[2],"eliminar":["3"]}'])
+    # 10 está fuera de rango y "3" repite una tarea ya ubicada
+    assert events == [("task", "hacer", "Ver series"), ("task", "planificar", "Informe")]
+    assert parser.result["eliminar"] == []
+
+
+def test_number_split_across_chunks_is_read_whole():
+    lines = [f"t{n}" for n in range(1, 13)]
+    parser = QuadrantStreamParser(lines)
+    events = feed_all(parser, ['{"hacer":[1', '2]}'])
+    assert events == [("task", "hacer", "t12")]
+
+
+def test_unknown_keys_are_ignored():
+    parser = QuadrantStreamParser()
+    events = feed_all(parser, ['{"otros":["x"],"hacer":["A"],"meta":{"k":["y"]}}'])
+    assert events == [("task", "hacer", "A")]
+
+
+def test_classify_stream_emits_then_returns_full_result():
+    model = FakeModel(['{"hacer":[2],', '"planificar":[1],"delegar":[],"eliminar":[],', '"recomendacion_top":"t"}'])
+    events = []
+    result = classify_stream(model, ["A", "B"], "Rol", lambda *event: events.append(event))
+    assert events == [("task", "hacer", "B"), ("task", "planificar", "A"), ("tip", None, "t")]
+    assert result["hacer"] == ["B"] and result["planificar"] == ["A"]
+    assert model.calls[0]["stream"] is True
+
+
+def test_classify_stream_retries_without_streaming_after_transient_error():
+    model = FakeModel(TimeoutError("lento"), matrix_json(hacer=[1], tip="t"))
+    events = []
+    result = classify_stream(model, ["A"], "Rol", lambda *event: events.append(event),
+                             retry=RetryPolicy(attempts=2, base=0, cap=0))
+    assert result["hacer"] == ["A"]
+    assert [call["stream"] for call in model.calls] == [True, False]
+    assert events == [("task", "hacer", "A"), ("tip", None, "t")]
+
+
+class SlowStream(FakeModel):
+    """Manda un trozo por vez, con una pausa antes de cada uno."""
+
+    def generate_content(self, contents, stream=False, **kwargs):
+        self.calls.append({"contents": contents, "stream": stream, **kwargs})
+
+        def chunks():
+            for text in ['{"hacer":[1],', '"planificar":[],"delegar":[],', '"eliminar":[]}']:
+                time.sleep(0.05)
+                yield FakeChunk(text)
+
+        return chunks()
+
+
+def test_classify_stream_stops_a_stream_that_outlives_the_deadline():
+    events = []
+    with pytest.raises(TimeoutError):
+        classify_stream(SlowStream(), ["A"], "Rol", lambda *event: events.append(event),
+                        retry=RetryPolicy(attempts=1), deadline=0.08)
+    assert events == [("task", "hacer", "A")]